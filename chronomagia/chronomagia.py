@@ -1,7 +1,6 @@
 from _collections import OrderedDict
 import asyncio
 import csv
-import difflib
 import json
 import os
 from time import time
@@ -50,6 +49,8 @@ class ChronoMagia:
         self.bot = bot
         self.settings = ChronoMagiaSettings("chronomagia")
         self.card_data = []
+        self.names_to_card = {}
+        self.name_matcher = rpadutils.FuzzyMatcher([])
         self.menu = Menu(bot)
         self.id_emoji = '\N{INFORMATION SOURCE}'
         self.pic_emoji = '\N{FRAME WITH PICTURE}'
@@ -73,14 +74,18 @@ class ChronoMagia:
             'data/chronomagia/summary.csv', SUMMARY_SHEET, standard_expiry_secs)
         file_reader = csv.reader(summary_text.splitlines(), delimiter=',')
         next(file_reader, None)  # skip header
-        self.card_data.clear()
+        card_data = []
         for row in file_reader:
             if not row or not row[0].strip():
                 # Ignore empty rows
                 continue
             if len(row) < 11:
                 print('bad row: ', row)
-            self.card_data.append(CmCard(row))
+            card_data.append(CmCard(row))
+
+        self.card_data = card_data
+        self.names_to_card = {x.name_clean: x for x in card_data}
+        self.name_matcher = rpadutils.FuzzyMatcher(self.names_to_card.keys())
 
     @commands.command(pass_context=True)
     async def cmid(self, ctx, *, query: str):
@@ -90,14 +95,14 @@ class ChronoMagia:
             await self.bot.say(inline('query must be at least 3 characters'))
             return
 
-        names_to_card = {x.name_clean: x for x in self.card_data}
+        names_to_card = self.names_to_card
 
         # Check if the card name starts with the query
         matches = list(filter(lambda x: x.startswith(query), names_to_card.keys()))
 
         # Find a card that closely matches the query
         if not matches:
-            matches = difflib.get_close_matches(query, names_to_card.keys(), n=1, cutoff=.6)
+            matches = self.name_matcher.get_close_matches(query, n=1, cutoff=.6)
 
         # Find a card that contains the query text
         if not matches:
@@ -6,6 +6,11 @@ from ply import lex, yacc
 
 from __main__ import user_allowed, send_cmd_help
 
+from . import rpadutils
+
+# Parsed damage specs kept around for repeat calculations
+DAMAGE_CONFIG_CACHE_SIZE = 200
+
 
 class PadLexer(object):
 
@@ -192,6 +197,9 @@ class DamageCalc:
 
     def __init__(self, bot):
         self.bot = bot
+        # Building the lexer compiles its tables, so do it once; each parse uses a clone
+        self.lexer = PadLexer().build()
+        self.config_cache = rpadutils.LruCache(DAMAGE_CONFIG_CACHE_SIZE)
 
     @commands.command(pass_context=True)
     async def helpdamage(self, ctx):
@@ -251,13 +259,21 @@ class DamageCalc:
         Use ^helpdamage for more info
         """
 
-        lexer = PadLexer().build()
-        lexer.input(damage_spec)
-        config = DamageConfig(lexer)
+        config = self._make_damage_config(damage_spec)
         damage = config.calculate(all_enhanced=False)
         enhanced_damage = config.calculate(all_enhanced=True)
         await self.bot.say("```Damage (no enhanced) :  {}\nDamage (all enhanced) : {}```".format(damage, enhanced_damage))
 
+    def _make_damage_config(self, damage_spec):
+        damage_spec = damage_spec.strip()
+        config = self.config_cache.get(damage_spec)
+        if config is None:
+            lexer = self.lexer.clone()
+            lexer.input(damage_spec)
+            config = DamageConfig(lexer)
+            self.config_cache.put(damage_spec, config)
+        return config
+
 
 def setup(bot):
     n = DamageCalc(bot)
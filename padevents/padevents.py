@@ -44,6 +44,9 @@ class PadEvents:
 
         self.fake_uid = -999
 
+        # PadGuide2 database generation the events were loaded from
+        self.events_generation = None
+
     def __unload(self):
         # Manually nulling out database because the GC for cogs seems to be pretty shitty
         self.events = list()
@@ -51,20 +54,27 @@ class PadEvents:
 
     async def reload_padevents(self):
         await self.bot.wait_until_ready()
-        while self == self.bot.get_cog('PadEvents'):
-            try:
-                await self.refresh_data()
-                print('Done refreshing PadEvents')
-            except Exception as ex:
-                print("reload padevents loop caught exception " + str(ex))
-                traceback.print_exc()
-
-            await asyncio.sleep(60 * 60 * 1)
+        try:
+            await self.refresh_data()
+            print('Done refreshing PadEvents')
+        except Exception as ex:
+            print("reload padevents caught exception " + str(ex))
+            traceback.print_exc()
+
+    async def on_padguide2_generation_changed(self, change):
+        if self != self.bot.get_cog('PadEvents'):
+            return
+        if change.tables_changed(padguide2.PgScheduledEvent, padguide2.PgDungeon, padguide2.PgEvent):
+            await self.reload_padevents()
 
     async def refresh_data(self):
         pg_cog = self.bot.get_cog('PadGuide2')
         await pg_cog.wait_until_ready()
-        database = pg_cog.database
+        database_handle = pg_cog.get_database_handle()
+        if database_handle.generation == self.events_generation:
+            return
+        self.events_generation = database_handle.generation
+        database = database_handle.database
         scheduled_events = database.all_scheduled_events()
 
         new_events = []
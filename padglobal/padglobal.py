@@ -1,6 +1,5 @@
 from collections import defaultdict
 import csv
-import difflib
 import discord
 from discord.ext import commands
 import io
@@ -58,6 +57,13 @@ def lookup_named_monster(query: str):
     return nm, err, debug_info
 
 
+def lookup_named_monsters(queries: list):
+    padinfo_cog = PADGLOBAL_COG.bot.get_cog('PadInfo')
+    if padinfo_cog is None:
+        return [(None, "cog not loaded", None) for _ in queries]
+    return padinfo_cog._findMonsters(queries)
+
+
 def monster_no_to_monster(monster_no):
     padinfo_cog = PADGLOBAL_COG.bot.get_cog('PadInfo')
     if padinfo_cog is None:
@@ -74,6 +80,9 @@ class PadGlobal:
         self.c_commands = dataIO.load_json(self.file_path)
         self.settings = PadGlobalSettings("padglobal")
 
+        # Built on first use; cleared by the commands that add or remove glossary terms
+        self.glossary_matcher = None
+
         global PADGLOBAL_COG
         PADGLOBAL_COG = self
 
@@ -488,7 +497,7 @@ class PadGlobal:
         matches = self._get_corrected_cmds(term, glossary.keys())
 
         if not matches:
-            matches = difflib.get_close_matches(term, glossary.keys(), n=1, cutoff=.8)
+            matches = self._get_glossary_matcher().get_close_matches(term, n=1, cutoff=.8)
 
         if not matches:
             return term, None
@@ -496,6 +505,11 @@ class PadGlobal:
             term = matches[0]
             return term, glossary[term]
 
+    def _get_glossary_matcher(self):
+        if self.glossary_matcher is None:
+            self.glossary_matcher = rpadutils.FuzzyMatcher(self.settings.glossary().keys())
+        return self.glossary_matcher
+
     @padglobal.command(pass_context=True)
     async def addglossary(self, ctx, term, *, definition):
         """Adds a term to the glossary.
@@ -511,12 +525,15 @@ class PadGlobal:
 
         op = 'EDITED' if term in self.settings.glossary() else 'ADDED'
         self.settings.addGlossary(term, definition)
+        if op == 'ADDED':
+            self.glossary_matcher = None
         await self.bot.say("PAD glossary term successfully {}.".format(op))
 
     @padglobal.command(pass_context=True)
     async def rmglossary(self, ctx, *, term):
         """Removes a term from the glossary."""
         self.settings.rmGlossary(term.lower())
+        self.glossary_matcher = None
         await self.bot.say("done")
 
     @commands.command(pass_context=True)
@@ -579,17 +596,20 @@ class PadGlobal:
 
     def which_to_text(self):
         items = list()
-        monsters = defaultdict(list)
+        monster_queries = list()
         for w in self.settings.which():
             if w.isdigit():
-                nm, _, _ = lookup_named_monster(w)
-                name = nm.group_computed_basename.title()
-                m = monster_no_to_monster(nm.monster_no)
-                grp = m.series.name
-                monsters[grp].append(name)
+                monster_queries.append(w)
             else:
                 items.append(w)
 
+        monsters = defaultdict(list)
+        for nm, _, _ in lookup_named_monsters(monster_queries):
+            name = nm.group_computed_basename.title()
+            m = monster_no_to_monster(nm.monster_no)
+            grp = m.series.name
+            monsters[grp].append(name)
+
         msg = '\nGeneral:\n{}'.format(', '.join(sorted(items)))
 
         tbl = prettytable.PrettyTable(['Group', 'Members'])
@@ -865,8 +885,9 @@ class PadGlobal:
             msg += '\n**{}** :\n{}\n'.format(term, definition)
 
         leader_guide = self.settings.leaderGuide()
-        name_to_guide = {self.term_to_monster_name(
-            monster_id): definition for monster_id, definition in leader_guide.items()}
+        monster_ids = list(leader_guide.keys())
+        name_to_guide = {nm.group_computed_basename.title(): leader_guide[monster_id]
+                         for monster_id, (nm, _, _) in zip(monster_ids, lookup_named_monsters(monster_ids))}
 
         msg += '\n\n__**Leader Guides**__'
         for term in sorted(name_to_guide.keys()):
@@ -928,10 +949,6 @@ class PadGlobal:
         self.settings.rmLeaderGuide(name)
         await self.bot.say("done")
 
-    def term_to_monster_name(self, term):
-        nm, _, _ = lookup_named_monster(term)
-        return nm.group_computed_basename.title()
-
 
 def check_simple_tree(monster):
     attr1 = monster.attr1
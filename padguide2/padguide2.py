@@ -5,25 +5,43 @@ Loads every PadGuide related JSON into a simple data structure, and then
 combines them into a an in-memory interconnected database.
 
 Don't hold on to any of the dastructures exported from here, or the
-entire database could be leaked when the module is reloaded.
+entire database could be leaked when the module is reloaded. Each rebuild
+is a new database generation. The PgDatabaseHandle from get_database_handle()
+always points at the current one, but it only avoids leaks for code that
+dereferences it on each use. Anything built from handle.database keeps that
+generation alive until it's rebuilt, so rebuild it on every
+GENERATION_CHANGED_EVENT. Old generations still alive are reported as leaks.
 """
 from _collections import defaultdict
 import asyncio
+import bisect
+import copy
 import csv
 from datetime import datetime
 from datetime import timedelta
 import difflib
+import functools
+import gc
+import heapq
+import itertools
 from itertools import groupby
+import json
 from operator import itemgetter
 import os
+import pickle
+import random
 import re
+import sys
 import time
 import traceback
+import tracemalloc
+import weakref
 
 import aiohttp
 import discord
 from discord.ext import commands
 from enum import Enum
+import numpy as np
 import pytz
 import romkan
 
@@ -32,7 +50,7 @@ from __main__ import send_cmd_help
 from . import rpadutils
 from .rpadutils import CogSettings
 from .utils import checks
-from .utils.chat_formatting import box, inline
+from .utils.chat_formatting import box, inline, pagify
 from .utils.dataIO import dataIO
 
 
@@ -41,6 +59,40 @@ JSON_FILE_PATTERN = 'data/padguide2/{}.json'
 CSV_FILE_PATTERN = 'data/padguide2/{}.csv'
 ATTR_EXPORT_PATH = 'data/padguide2/card_data.csv'
 
+# Binary snapshot of the parsed (but not yet linked) PadGuide tables.
+SNAPSHOT_FILE_PATH = 'data/padguide2/database.snapshot'
+# Bump this whenever a PgItem constructor changes, to invalidate old snapshots.
+SNAPSHOT_VERSION = 5
+
+# Characters read at a time when streaming a table dump.
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+JSON_ITEM_SEPARATOR_RE = re.compile(r'[ \t\r\n]*([,\]])[ \t\r\n]*')
+
+# Scratch file for the loader benchmark.
+BENCHMARK_FILE_PATH = 'data/padguide2/loader_benchmark.json'
+
+# Normalized queries remembered by each MonsterIndex; a rebuilt index starts empty.
+MONSTER_LOOKUP_CACHE_SIZE = 2000
+
+# Default number of ranked candidates from MonsterIndex.find_monster_candidates.
+MONSTER_CANDIDATE_COUNT = 4
+
+# Seeded from the clock so that generation ids stay unique across module reloads.
+_generation_ids = itertools.count(int(time.time() * 1000))
+
+# Generation id -> PgRawDatabase for every loaded database still in memory.
+_live_generations = weakref.WeakValueDictionary()
+
+# How long clients get to drop an old generation before it's reported as leaked.
+GENERATION_RELEASE_CHECK_SECS = 5 * 60
+
+# Client cogs can listen for new database generations by defining:
+#     async def on_padguide2_generation_changed(self, change: padguide2.PgDatabaseChange)
+# This fires right after each new generation is swapped in; a rebuild with no changes
+# is dropped instead. Anything built from the old generation keeps it in memory, so
+# clients holding such data must rebuild it on every event, whichever tables changed.
+GENERATION_CHANGED_EVENT = 'padguide2_generation_changed'
+
 SHEETS_PATTERN = 'https://docs.google.com/spreadsheets/d/1EoZJ3w5xsXZ67kmarLE4vfrZSIIIAfj04HXeZVST3eY/pub?gid={}&single=true&output=csv'
 GROUP_BASENAMES_OVERRIDES_SHEET = SHEETS_PATTERN.format('2070615818')
 NICKNAME_OVERRIDES_SHEET = SHEETS_PATTERN.format('0')
@@ -93,7 +145,14 @@ class PadGuide2(object):
         # An int -> set(string), monster_id_na to set of basename overrides
         self.basename_overrides = defaultdict(set)
 
-        self.database = PgRawDatabase(skip_load=True)
+        # An int -> list(string), monster_id_na to monster data override row
+        self.monsterdata_overrides = {}
+
+        self.database_handle = PgDatabaseHandle()
+
+        # Metrics for the most recent database rebuild
+        self.rebuild_secs = 0.0
+        self.rebuild_loop_blocked_secs = 0.0
 
     @asyncio.coroutine
     def wait_until_ready(self):
@@ -104,9 +163,22 @@ class PadGuide2(object):
         """
         yield from self._is_ready.wait()
 
-    def create_index(self, accept_filter=None):
-        """Exported function that allows a client cog to create a monster index"""
-        return MonsterIndex(self.database, self.nickname_overrides, self.basename_overrides, accept_filter=accept_filter)
+    @property
+    def database(self):
+        return self.database_handle.database
+
+    def get_database_handle(self):
+        """Exported function that gives a client cog the handle to the current database"""
+        return self.database_handle
+
+    def create_index(self, accept_filter=None, parent=None):
+        """Exported function that allows a client cog to create a monster index.
+
+        Pass an unfiltered index from the same database as parent to build a filtered
+        one cheaply out of the parent's naming and search structures.
+        """
+        return MonsterIndex(self.database, self.nickname_overrides, self.basename_overrides,
+                            accept_filter=accept_filter, parent=parent)
 
     def get_monster_by_no(self, monster_no: int):
         """Exported function that allows a client cog to get a full PgMonster by monster_no"""
@@ -117,7 +189,7 @@ class PadGuide2(object):
 
     def __unload(self):
         # Manually nulling out database because the GC for cogs seems to be pretty shitty
-        self.database = None
+        self.database_handle.swap(PgRawDatabase(skip_load=True))
         self._is_ready.clear()
 
     async def reload_data_task(self):
@@ -125,7 +197,8 @@ class PadGuide2(object):
 
         try:
             # Try and load the PadGuide database the first time with existing files
-            self.database = PgRawDatabase()
+            self._swap_database(await self._run_rebuild(
+                PgRawDatabase, incremental=self.settings.incrementalRefresh()))
             self._is_ready.set()
             print('Finished initial PadGuide2 load with existing database')
         except Exception as ex:
@@ -160,28 +233,86 @@ class PadGuide2(object):
     async def download_and_refresh_nicknames(self):
         await self._download_files()
 
-        nickname_overrides = self._csv_to_tuples(NICKNAME_FILE_PATTERN)
-        basename_overrides = self._csv_to_tuples(BASENAME_FILE_PATTERN)
+        nickname_override_rows = self._csv_to_tuples(NICKNAME_FILE_PATTERN)
+        basename_override_rows = self._csv_to_tuples(BASENAME_FILE_PATTERN)
 
-        self.nickname_overrides = {x[0].lower(): int(x[1])
-                                   for x in nickname_overrides if x[1].isdigit()}
+        nickname_overrides = {x[0].lower(): int(x[1])
+                              for x in nickname_override_rows if x[1].isdigit()}
 
-        self.basename_overrides = defaultdict(set)
-        for x in basename_overrides:
+        basename_overrides = defaultdict(set)
+        for x in basename_override_rows:
             k, v = x
             if k.isdigit():
-                self.basename_overrides[int(k)].add(v.lower())
+                basename_overrides[int(k)].add(v.lower())
 
-        monsterdata_overrides = self._csv_to_tuples(MONSTERDATA_FILE_PATTERN, 7)
-        self.monsterdata_overrides = {int(x[0]): x for x in monsterdata_overrides if x[0].isdigit()}
+        monsterdata_override_rows = self._csv_to_tuples(MONSTERDATA_FILE_PATTERN, 7)
+        monsterdata_overrides = {int(x[0]): x for x in monsterdata_override_rows if x[0].isdigit()}
 
-        self.database = PgRawDatabase()
-        self.database.update_with_overrides(self.monsterdata_overrides)
-        self.index = MonsterIndex(self.database, self.nickname_overrides, self.basename_overrides)
+        database, index = await self._run_rebuild(
+            self._build_database, nickname_overrides, basename_overrides, monsterdata_overrides)
 
-        self.write_monster_attr_data()
+        overrides_changed = (nickname_overrides != self.nickname_overrides
+                             or basename_overrides != self.basename_overrides
+                             or monsterdata_overrides != self.monsterdata_overrides)
+        change = PgDatabaseChange(self.database_handle.database, database, overrides_changed)
+        if not change.has_changes():
+            # Keeping the current generation leaves everything clients built from it valid
+            print('PadGuide2 data unchanged, keeping generation {}'.format(self.database_handle.generation))
+            return
+
+        # Swap everything in together so clients never see a mix of old and new data
+        self.nickname_overrides = nickname_overrides
+        self.basename_overrides = basename_overrides
+        self.monsterdata_overrides = monsterdata_overrides
+        self.index = index
+        self._swap_database(database, change)
+
+    def _swap_database(self, database, change=None):
+        change = change or PgDatabaseChange(self.database_handle.database, database, False)
+        old_generation = self.database_handle.swap(database)
+        print('PadGuide2 swapped database generation {} -> {}'.format(old_generation, database.generation))
+        self.bot.loop.create_task(self._check_generation_released(old_generation))
+
+        print('PadGuide2 publishing change: {}'.format(change))
+        self.bot.dispatch(GENERATION_CHANGED_EVENT, change)
+
+    async def _check_generation_released(self, generation):
+        await asyncio.sleep(GENERATION_RELEASE_CHECK_SECS)
+        gc.collect()
+        if generation in _live_generations:
+            print('PadGuide2 database generation {} was not released, {} generations live'.format(
+                generation, len(_live_generations)))
+
+    def _build_database(self, nickname_overrides, basename_overrides, monsterdata_overrides):
+        """Builds a new database and index. Runs on a worker thread, must not touch cog state."""
+        database = PgRawDatabase(incremental=self.settings.incrementalRefresh())
+        database.update_with_overrides(monsterdata_overrides)
+        index = MonsterIndex(database, nickname_overrides, basename_overrides)
+        self.write_monster_attr_data(database)
+        return database, index
+
+    async def _run_rebuild(self, build_fn, *args, **kwargs):
+        """Runs build_fn in the default executor, recording how long the loop was stalled."""
+        start_time = time.time()
+        future = self.bot.loop.run_in_executor(None, functools.partial(build_fn, *args, **kwargs))
+
+        # Wake up regularly while waiting; any lateness means the loop was blocked
+        check_interval_secs = 0.1
+        blocked_secs = 0.0
+        while True:
+            check_start = time.time()
+            done, _ = await asyncio.wait([future], timeout=check_interval_secs)
+            if done:
+                break
+            blocked_secs += max(0.0, time.time() - check_start - check_interval_secs)
 
-    def write_monster_attr_data(self):
+        self.rebuild_secs = time.time() - start_time
+        self.rebuild_loop_blocked_secs = blocked_secs
+        print('PadGuide2 rebuild took {:.2f}s, loop blocked for {:.2f}s'.format(
+            self.rebuild_secs, self.rebuild_loop_blocked_secs))
+        return future.result()
+
+    def write_monster_attr_data(self, database):
         """Write id,server,attr1,attr2 to be used by the portrait generation process."""
         attr_short_prefix_map = {
             Attribute.Fire: 'r',
@@ -192,7 +323,7 @@ class PadGuide2(object):
         }
 
         # Monsters who exist only in na have the same na/jp id but differing monster_no
-        na_only = [x for x in self.database._monster_map.values() if x.monster_no !=
+        na_only = [x for x in database._monster_map.values() if x.monster_no !=
                    x.monster_no_na and x.monster_no_na == x.monster_no_jp]
 
         na_only_base_no = [x.monster_no for x in na_only]
@@ -200,7 +331,7 @@ class PadGuide2(object):
 
         with open(ATTR_EXPORT_PATH, 'w') as csvfile:
             writer = csv.writer(csvfile, delimiter=',', lineterminator='\n')
-            for m in self.database._monster_map.values():
+            for m in database._monster_map.values():
                 attr1 = attr_short_prefix_map[m.attr1]
                 attr2 = attr_short_prefix_map[m.attr2] if m.attr2 else ''
                 if m.monster_no in na_only_base_no:
@@ -243,14 +374,30 @@ class PadGuide2(object):
         general_dummy_file = DUMMY_FILE_PATTERN.format('general')
         download_all = rpadutils.checkPadguideCacheFile(general_dummy_file, quick_expiry_secs)
 
+        rate_limiter = rpadutils.AsyncRateLimiter(self.settings.downloadConcurrency(),
+                                                  self.settings.downloadRequestsPerSec())
+        # endpoint -> (seconds, bytes)
+        download_stats = {}
+        # endpoint -> exception, for each table that failed to download
+        download_failures = {}
+
+        async def download(client_session, endpoint, result_file, time_ms=0):
+            start_time = time.time()
+            try:
+                byte_count = await rpadutils.async_cached_padguide_request(
+                    client_session, endpoint, result_file, time_ms=time_ms, rate_limiter=rate_limiter)
+            except Exception as ex:
+                download_failures[endpoint] = ex
+                raise
+            download_stats[endpoint] = (time.time() - start_time, byte_count)
+
+        downloads = []
         async with aiohttp.ClientSession() as client_session:
             for type in self._standard_refresh:
                 endpoint = type.file_name()
                 result_file = JSON_FILE_PATTERN.format(endpoint)
                 if download_all or rpadutils.should_download(result_file, quick_expiry_secs):
-                    await rpadutils.async_cached_padguide_request(client_session, endpoint, result_file)
-                    # Sleep to avoid overwhelming with requests
-                    await asyncio.sleep(1)
+                    downloads.append(download(client_session, endpoint, result_file))
 
             for type in self._quick_refresh:
                 cur_time = int(round(time.time() * 1000))
@@ -258,7 +405,23 @@ class PadGuide2(object):
                 endpoint = type.file_name()
                 result_file = JSON_FILE_PATTERN.format(endpoint)
                 if download_all or rpadutils.should_download(result_file, quick_expiry_secs):
-                    await rpadutils.async_cached_padguide_request(client_session, endpoint, result_file, time_ms=three_weeks_ago)
+                    downloads.append(download(client_session, endpoint, result_file, time_ms=three_weeks_ago))
+
+            if downloads:
+                start_time = time.time()
+                # Let every download finish before the session closes, even if some fail
+                await asyncio.gather(*downloads, return_exceptions=True)
+                total_secs = time.time() - start_time
+                total_bytes = sum(b for _, b in download_stats.values())
+                table_stats = ', '.join('{} {:.1f}s/{}B'.format(endpoint, secs, byte_count)
+                                        for endpoint, (secs, byte_count) in sorted(download_stats.items()))
+                print('Downloaded {} PadGuide tables ({}B) in {:.1f}s: {}'.format(
+                    len(download_stats), total_bytes, total_secs, table_stats))
+
+                for endpoint, ex in sorted(download_failures.items()):
+                    print('Failed to download PadGuide table {}: {!r}'.format(endpoint, ex))
+                if download_failures:
+                    raise next(iter(download_failures.values()))
 
         overrides_expiry_secs = 1 * 60 * 60
         await rpadutils.makeAsyncCachedPlainRequest(
@@ -275,13 +438,105 @@ class PadGuide2(object):
         if ctx.invoked_subcommand is None:
             await send_cmd_help(ctx)
 
+    @padguide2.command(pass_context=True)
+    @checks.is_owner()
+    async def loadstats(self, ctx):
+        """Shows how long the last database load took"""
+        msg = 'Database loaded in {:.2f}s\n{}'.format(
+            self.database.load_secs, self.database.load_stats_text())
+        msg += '\nLast rebuild took {:.2f}s, event loop blocked for {:.2f}s'.format(
+            self.rebuild_secs, self.rebuild_loop_blocked_secs)
+        msg += '\n\n' + self.database.link_stats_text()
+        for page in pagify(msg):
+            await self.bot.say(box(page))
+
+    @padguide2.command(pass_context=True)
+    @checks.is_owner()
+    async def generations(self, ctx):
+        """Shows the current database generation and any still in memory"""
+        gc.collect()
+        live = sorted(_live_generations.keys())
+        msg = 'Current generation: {}\n{} generations live: {}'.format(
+            self.database_handle.generation, len(live), ', '.join(map(str, live)))
+        await self.bot.say(box(msg))
+
+    @padguide2.command(pass_context=True)
+    @checks.is_owner()
+    async def memory(self, ctx):
+        """Shows the estimated memory used per table"""
+        report = sorted(self.database.table_memory_report(), key=lambda x: x[2], reverse=True)
+        msg = '{:<24} {:>8} {:>12}'.format('Table', 'Items', 'Bytes')
+        for file_name, count, byte_count in report:
+            msg += '\n{:<24} {:>8} {:>12}'.format(file_name, count, byte_count)
+        msg += '\n{:<24} {:>8} {:>12}'.format(
+            'Total', sum(x[1] for x in report), sum(x[2] for x in report))
+        for page in pagify(msg):
+            await self.bot.say(box(page))
+
+    @padguide2.command(pass_context=True)
+    @checks.is_owner()
+    async def benchloader(self, ctx, row_count: int=200000, trace_memory: bool=False):
+        """Compares the eager and streaming table loaders on a synthetic dump
+
+        trace_memory also reports peak memory using tracemalloc. Tracing is process
+        wide: it slows the whole bot down while the benchmark runs, and the peak
+        includes anything other threads allocate meanwhile.
+        """
+        await self.bot.say(inline('Benchmarking loaders on {} rows'.format(row_count)))
+        results = await self.bot.loop.run_in_executor(
+            None, benchmark_table_loaders, row_count, trace_memory)
+        msg = '{:<10} {:>8} {:>12} {:>8}'.format('Loader', 'Secs', 'Peak bytes', 'Items')
+        for name, secs, peak_bytes, item_count in results:
+            msg += '\n{:<10} {:>8.2f} {:>12} {:>8}'.format(
+                name, secs, '-' if peak_bytes is None else peak_bytes, item_count)
+        await self.bot.say(box(msg))
+
+    @padguide2.command(pass_context=True)
+    @checks.is_owner()
+    async def setincremental(self, ctx, enabled: bool):
+        """Enables/disables applying only changed rows on refresh"""
+        self.settings.setIncrementalRefresh(enabled)
+        await self.bot.say(inline('Incremental refresh set to {}'.format(enabled)))
+
+    @padguide2.command(pass_context=True)
+    @checks.is_owner()
+    async def setdownloadlimits(self, ctx, concurrency: int, requests_per_sec: float):
+        """Sets the max concurrent table downloads and request rate to the host"""
+        if concurrency < 1 or requests_per_sec <= 0:
+            await self.bot.say(inline('Limits must be positive'))
+            return
+        self.settings.setDownloadLimits(concurrency, requests_per_sec)
+        await self.bot.say(inline('Set download limits to {} concurrent, {}/s'.format(
+            concurrency, requests_per_sec)))
+
 
 class PadGuide2Settings(CogSettings):
     def make_default_settings(self):
         config = {
+            'incremental_refresh': True,
+            'download_concurrency': 4,
+            'download_requests_per_sec': 4,
         }
         return config
 
+    def incrementalRefresh(self):
+        return self.bot_settings['incremental_refresh']
+
+    def setIncrementalRefresh(self, enabled: bool):
+        self.bot_settings['incremental_refresh'] = enabled
+        self.save_settings()
+
+    def downloadConcurrency(self):
+        return self.bot_settings['download_concurrency']
+
+    def downloadRequestsPerSec(self):
+        return self.bot_settings['download_requests_per_sec']
+
+    def setDownloadLimits(self, concurrency: int, requests_per_sec: float):
+        self.bot_settings['download_concurrency'] = concurrency
+        self.bot_settings['download_requests_per_sec'] = requests_per_sec
+        self.save_settings()
+
 
 def setup(bot):
     n = PadGuide2(bot)
@@ -289,10 +544,94 @@ def setup(bot):
     n.register_tasks()
 
 
+class PgDatabaseHandle(object):
+    """A lightweight reference to whichever database generation is current.
+
+    Swapping in a new generation drops the handle's reference to the old one.
+    That doesn't release anything a client built from the old generation; the
+    client has to rebuild that when the generation changes.
+    """
+
+    def __init__(self):
+        self._database = PgRawDatabase(skip_load=True)
+
+    @property
+    def database(self):
+        return self._database
+
+    @property
+    def generation(self):
+        return self._database.generation
+
+    def swap(self, database):
+        """Makes database current, returning the generation it replaced."""
+        old_generation = self._database.generation
+        self._database = database
+        return old_generation
+
+
+class PgDatabaseChange(object):
+    """Summary of the differences between two database generations.
+
+    Only holds ids and names, so it's safe for clients to keep.
+    """
+
+    def __init__(self, old_database, new_database, overrides_changed: bool):
+        self.old_generation = old_database.generation
+        self.new_generation = new_database.generation
+        self.overrides_changed = overrides_changed
+
+        old_signatures = old_database.table_signatures
+        new_signatures = new_database.table_signatures
+        self.changed_tables = set(name for name in set(old_signatures) | set(new_signatures)
+                                  if old_signatures.get(name) != new_signatures.get(name))
+
+        old_monster_nos = set(old_database._monster_map.keys())
+        new_monster_nos = set(new_database._monster_map.keys())
+        self.added_monster_nos = sorted(new_monster_nos - old_monster_nos)
+        self.removed_monster_nos = sorted(old_monster_nos - new_monster_nos)
+
+    def has_changes(self):
+        return bool(self.changed_tables or self.overrides_changed)
+
+    def tables_changed(self, *itemtypes):
+        """True if any of the PgItem types were changed."""
+        return any(t.file_name() in self.changed_tables for t in itemtypes)
+
+    def __str__(self):
+        return 'generation {} -> {}, tables changed: [{}], {} monsters added, {} removed{}'.format(
+            self.old_generation, self.new_generation, ', '.join(sorted(self.changed_tables)),
+            len(self.added_monster_nos), len(self.removed_monster_nos),
+            ', overrides changed' if self.overrides_changed else '')
+
+
 class PgRawDatabase(object):
-    def __init__(self, skip_load=False):
+    def __init__(self, skip_load=False, incremental=True):
         self._skip_load = skip_load
-        self._all_pg_items = []
+        self._incremental = incremental
+
+        self.generation = next(_generation_ids)
+        if not skip_load:
+            _live_generations[self.generation] = self
+
+        # Source ('snapshot', 'delta' or 'json') -> [table count, load seconds]
+        self.load_stats = {
+            'snapshot': [0, 0.0],
+            'delta': [0, 0.0],
+            'json': [0, 0.0],
+        }
+        load_start = time.time()
+
+        self._snapshot_tables = {} if skip_load else load_snapshot_tables()
+        self._snapshot_dirty = False
+        self.load_stats['snapshot'][1] += time.time() - load_start
+
+        # file_name -> item map, for every loaded table
+        self._table_maps = {}
+        # Every loaded PgItem type, in load order
+        self._table_types = []
+        # file_name -> source file signature, for every loaded table
+        self.table_signatures = {}
 
         # Load raw data items into id->value maps
         self._attribute_map = self._load(PgAttribute)
@@ -319,13 +658,24 @@ class PgRawDatabase(object):
         self._egg_monster_map = self._load(PgEggMonster)
         self._egg_name_map = self._load(PgEggName)
 
-        # Ensure that every item has loaded its dependencies
-        for i in self._all_pg_items:
-            self._ensure_loaded(i)
+        # Items are snapshotted before linking, so the snapshot stays flat
+        if self._snapshot_dirty:
+            save_snapshot_tables(self._snapshot_tables)
+        self._snapshot_tables = None
+
+        # Link each table once everything it references has been linked. Tables
+        # within a level don't depend on each other.
+        # file_name -> PgLinkStats
+        self.link_stats = {}
+        self._current_link_stats = None
+        for level in link_levels(self._table_types):
+            for itemtype in level:
+                self._link_table(itemtype)
 
         # Finish loading now that all the dependencies are resolved
-        for i in self._all_pg_items:
-            i.finalize()
+        for itemtype in self._table_types:
+            for i in self._table_maps[itemtype.file_name()].values():
+                i.finalize()
 
         # Stick the monsters into groups so that we can calculate info across
         # the entire group
@@ -339,14 +689,22 @@ class PgRawDatabase(object):
         self.monster_no_na_to_monster_no = {
             m.monster_no_na: m.monster_no for m in self._monster_map.values()}
 
-        # Skill rotation map
-        self._server_to_rotating_skillups = {
-            'NA': [],
-            'JP': [],
-        }
-        for m in self._monster_map.values():
-            for server in m.server_actives:
-                self._server_to_rotating_skillups[server].append(m)
+        # Skill rotations, looked up by the server's current date on access
+        self.skill_rotations = SkillRotationSchedule(self._skill_rotation_dated_map.values())
+
+        # Column-wise copy of the monster search data, for filtering every monster at once
+        self.monster_columns = MonsterColumnStore(self.all_monsters())
+
+        self.load_secs = time.time() - load_start
+        if not skip_load:
+            print('PgRawDatabase loaded in {:.2f}s, {}'.format(self.load_secs, self.load_stats_text()))
+            for file_name, stats in self.link_stats.items():
+                if stats.dangling_keys or stats.errors:
+                    print('PgRawDatabase linked {}: {}'.format(file_name, stats))
+
+    def load_stats_text(self):
+        return ', '.join('{} tables from {} in {:.2f}s'.format(count, source, secs)
+                         for source, (count, secs) in self.load_stats.items())
 
     def update_with_overrides(self, monsterdata_overrides):
         for m_id_na, data in monsterdata_overrides.items():
@@ -367,24 +725,83 @@ class PgRawDatabase(object):
         if self._skip_load:
             return {}
 
-        file_path = JSON_FILE_PATTERN.format(itemtype.file_name())
-        item_list = []
-
-        if dataIO.is_valid_json(file_path):
-            json_data = dataIO.load_json(file_path)
-            item_list = [itemtype(item) for item in json_data['items']]
+        start_time = time.time()
+        file_name = itemtype.file_name()
+        file_path = JSON_FILE_PATTERN.format(file_name)
+        signature = snapshot_signature(file_path)
 
-        result_map = {item.key(): item for item in item_list if not item.deleted()}
-
-        self._all_pg_items.extend(result_map.values())
+        # Snapshot entries are (signature, max TSTAMP, raw row count, item map)
+        snapshot_entry = self._snapshot_tables.get(file_name)
+        if signature and snapshot_entry and snapshot_entry[0] == signature:
+            source = 'snapshot'
+            result_map = snapshot_entry[3]
+        else:
+            source = 'json'
+            result_map, row_count, max_tstamp = {}, 0, 0
+            try:
+                can_merge = self._incremental and snapshot_entry and itemtype.incremental()
+                if signature and can_merge:
+                    result_map, row_count, max_tstamp, changed_count = load_table_items(
+                        itemtype, file_path, snapshot_entry[1], snapshot_entry[3])
+                    # A dump which went back in time can't be merged by TSTAMP; rebuild it fully
+                    if max_tstamp >= snapshot_entry[1]:
+                        source = 'delta'
+                        print('{}: applied {} changed rows'.format(file_name, changed_count))
+                if signature and source == 'json':
+                    result_map, row_count, max_tstamp, _ = load_table_items(itemtype, file_path)
+            except (json.JSONDecodeError, UnicodeDecodeError) as ex:
+                print('PadGuide2 table {} is not valid JSON, skipping it'.format(file_name), ex)
+                result_map, row_count, max_tstamp = {}, 0, 0
+
+            if signature:
+                self._snapshot_tables[file_name] = (signature, max_tstamp, row_count, result_map)
+                self._snapshot_dirty = True
+
+        self._table_types.append(itemtype)
+        self._table_maps[file_name] = result_map
+        self.table_signatures[file_name] = signature
+
+        stats = self.load_stats[source]
+        stats[0] += 1
+        stats[1] += time.time() - start_time
 
         return result_map
 
-    def _ensure_loaded(self, item: 'PgItem'):
-        if item:
-            item.ensure_loaded(self)
+    def table_memory_report(self):
+        """Returns a list of (file_name, item count, estimated bytes) per table."""
+        return [(file_name, len(item_map), estimate_table_bytes(item_map))
+                for file_name, item_map in self._table_maps.items()]
+
+    def _link_table(self, itemtype):
+        """Links every item in the table in one pass, counting failures instead of raising."""
+        stats = PgLinkStats()
+        self._current_link_stats = stats
+        start_time = time.time()
+        for item in self._table_maps[itemtype.file_name()].values():
+            try:
+                item.load(self)
+            except Exception as ex:
+                stats.errors += 1
+                if stats.first_error is None:
+                    stats.first_error = 'key={} {}: {}'.format(item.key(), type(ex).__name__, ex)
+        stats.secs = time.time() - start_time
+        self._current_link_stats = None
+        self.link_stats[itemtype.file_name()] = stats
+
+    def _lookup(self, item_map: dict, key):
+        """Gets a referenced item; while linking, a missing non-empty key counts as dangling."""
+        item = item_map.get(key)
+        if item is None and key and self._current_link_stats is not None:
+            self._current_link_stats.dangling_keys += 1
         return item
 
+    def link_stats_text(self):
+        total_secs = sum(stats.secs for stats in self.link_stats.values())
+        lines = ['Linked {} tables in {:.2f}s'.format(len(self.link_stats), total_secs)]
+        for file_name, stats in sorted(self.link_stats.items(), key=lambda x: x[1].secs, reverse=True):
+            lines.append('{:<24} {}'.format(file_name, stats))
+        return '\n'.join(lines)
+
     def normalize_monster_no_na(self, monster_no_na: int):
         if monster_no_na > 10000:
             # Allows crows to be referenced
@@ -410,79 +827,371 @@ class PgRawDatabase(object):
 
     def rotating_skillups(self, server: str):
         """Gets monsters used as rotating skillups for the specified server"""
-        return list(self._server_to_rotating_skillups[server])
+        return self.skill_rotations.rotating_monsters(server)
 
     def getAttributeEnum(self, ta_seq: int):
-        attr = self._ensure_loaded(self._attribute_map.get(ta_seq))
+        attr = self._lookup(self._attribute_map, ta_seq)
         return attr.value if attr else None
 
     def getAwakening(self, tma_seq: int):
-        return self._ensure_loaded(self._awakening_map.get(tma_seq))
+        return self._lookup(self._awakening_map, tma_seq)
 
     def getDungeon(self, dungeon_seq: int):
-        return self._ensure_loaded(self._dungeon_map.get(dungeon_seq))
+        return self._lookup(self._dungeon_map, dungeon_seq)
 
     def getDungeonMonsterDrop(self, tdmd_seq: int):
-        return self._ensure_loaded(self._dungeon_monster_drop_map.get(tdmd_seq))
+        return self._lookup(self._dungeon_monster_drop_map, tdmd_seq)
 
     def getDungeonMonster(self, tdm_seq: int):
-        return self._ensure_loaded(self._dungeon_monster_map.get(tdm_seq))
+        return self._lookup(self._dungeon_monster_map, tdm_seq)
 
     def getEvent(self, event_seq: int):
-        return self._ensure_loaded(self._event_map.get(event_seq))
+        return self._lookup(self._event_map, event_seq)
 
     def getEvolution(self, tv_seq: int):
-        return self._ensure_loaded(self._evolution_map.get(tv_seq))
+        return self._lookup(self._evolution_map, tv_seq)
 
     def getEvolutionMaterial(self, tem_seq: int):
-        return self._ensure_loaded(self._evolution_material_map.get(tem_seq))
+        return self._lookup(self._evolution_material_map, tem_seq)
 
     def getMonster(self, monster_no: int):
-        return self._ensure_loaded(self._monster_map.get(monster_no))
+        return self._lookup(self._monster_map, monster_no)
 
+    # Add info, prices and leader data are optional, so they never count as dangling
     def getMonsterAddInfo(self, monster_no: int):
-        return self._ensure_loaded(self._monster_add_info_map.get(monster_no))
+        return self._monster_add_info_map.get(monster_no)
 
     def getMonsterInfo(self, monster_no: int):
-        return self._ensure_loaded(self._monster_info_map.get(monster_no))
+        return self._lookup(self._monster_info_map, monster_no)
 
     def getMonsterPrice(self, monster_no: int):
-        return self._ensure_loaded(self._monster_price_map.get(monster_no))
+        return self._monster_price_map.get(monster_no)
 
     def getSeries(self, tsr_seq: int):
-        return self._ensure_loaded(self._series_map.get(tsr_seq))
+        return self._lookup(self._series_map, tsr_seq)
 
     def getScheduledEvent(self, schedule_seq: int):
-        return self._ensure_loaded(self._scheduled_event_map.get(schedule_seq))
+        return self._lookup(self._scheduled_event_map, schedule_seq)
 
     def getSkill(self, ts_seq: int):
-        return self._ensure_loaded(self._skill_map.get(ts_seq))
+        return self._lookup(self._skill_map, ts_seq)
 
     def getSkillLeaderData(self, ts_seq: int):
         skill_leader = self._skill_leader_data_map.get(ts_seq)
         if skill_leader:
-            return self._ensure_loaded(skill_leader)
+            return skill_leader
         else:
             return PgSkillLeaderData.empty()
 
     def getSkillRotation(self, tsr_seq: int):
-        return self._ensure_loaded(self._skill_rotation_map.get(tsr_seq))
+        return self._lookup(self._skill_rotation_map, tsr_seq)
 
     def getSkillRotationDated(self, tsrl_seq: int):
-        return self._ensure_loaded(self._skill_rotation_dated_map.get(tsrl_seq))
+        return self._lookup(self._skill_rotation_dated_map, tsrl_seq)
 
     def getTypeName(self, tt_seq: int):
-        type = self._ensure_loaded(self._type_map.get(tt_seq))
+        type = self._lookup(self._type_map, tt_seq)
         return type.name if type else None
 
     def getEggInstance(self, tet_seq: int):
-        return self._ensure_loaded(self._egg_instance_map.get(tet_seq))
+        return self._lookup(self._egg_instance_map, tet_seq)
 
     def getEggMonster(self, tem_seq: int):
-        return self._ensure_loaded(self._egg_monster_map.get(tem_seq))
+        return self._lookup(self._egg_monster_map, tem_seq)
 
     def getEggName(self, tetn_seq: int):
-        return self._ensure_loaded(self._egg_name_map.get(tetn_seq))
+        return self._lookup(self._egg_name_map, tetn_seq)
+
+
+def estimate_table_bytes(item_map: dict):
+    """Shallow size of a table: the map, the items and their values, excluding linked items."""
+    total = sys.getsizeof(item_map)
+    for item in item_map.values():
+        total += sys.getsizeof(item)
+        for slot in item_slots(type(item)):
+            value = getattr(item, slot, None)
+            if value is not None and not isinstance(value, PgItem):
+                total += sys.getsizeof(value)
+    return total
+
+
+class PgLinkStats(object):
+    """How linking a single table went."""
+
+    def __init__(self):
+        self.secs = 0.0
+        self.dangling_keys = 0
+        self.errors = 0
+        self.first_error = None
+
+    def __str__(self):
+        text = '{:.3f}s, {} dangling keys, {} errors'.format(self.secs, self.dangling_keys, self.errors)
+        if self.first_error:
+            text += ' (first: {})'.format(self.first_error)
+        return text
+
+
+def link_levels(itemtypes: list):
+    """Groups PgItem types into levels which only depend on types in earlier levels.
+
+    Order within a level follows itemtypes, so linking is deterministic.
+    Dependencies on types which aren't in itemtypes are ignored.
+    """
+    remaining = list(itemtypes)
+    linked = set()
+    levels = []
+    while remaining:
+        level = [t for t in remaining
+                 if all(d in linked or d not in itemtypes for d in t.dependencies())]
+        if not level:
+            raise ValueError('Cyclic PgItem dependencies: {}'.format(
+                ', '.join(t.__name__ for t in remaining)))
+        levels.append(level)
+        linked.update(level)
+        remaining = [t for t in remaining if t not in linked]
+    return levels
+
+
+def item_slots(itemtype):
+    return [slot for cls in itemtype.__mro__ for slot in getattr(cls, '__slots__', ())]
+
+
+def snapshot_signature(file_path: str):
+    """Identifies a version of a source JSON file; None if it doesn't exist."""
+    if not os.path.exists(file_path):
+        return None
+    stat = os.stat(file_path)
+    return (SNAPSHOT_VERSION, stat.st_size, stat.st_mtime_ns)
+
+
+class JsonItemStream(object):
+    """Iterates the rows of a PadGuide {"items": [...]} dump one at a time.
+
+    Only a chunk of the file and the row being decoded are held in memory,
+    rather than the whole parsed dump. Raises json.JSONDecodeError if the
+    dump is malformed.
+    """
+
+    def __init__(self, f, chunk_size: int=JSON_STREAM_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def __iter__(self):
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            if key == 'items':
+                yield from self._iter_items()
+            else:
+                self._decode()
+            if self._expect(',}') == '}':
+                return
+
+    def _iter_items(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        raw_decode = self._decoder.raw_decode
+        match_separator = JSON_ITEM_SEPARATOR_RE.match
+        while True:
+            self._peek()
+            buf, pos = self._buf, self._pos
+            # Decode every complete row already buffered before reading more
+            while True:
+                try:
+                    row, pos = raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Most likely the row is cut off at the end of the buffer
+                    if self._eof:
+                        raise
+                    self._fill()
+                    break
+                self._pos = pos
+                yield row
+                separator = match_separator(buf, pos)
+                if not separator:
+                    if self._expect(',]') == ']':
+                        return
+                    break
+                self._pos = pos = separator.end()
+                if separator.group(1) == ']':
+                    return
+
+    def _fill(self):
+        """Appends the next chunk to the buffer, dropping what was already consumed."""
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise json.JSONDecodeError('Unexpected end of dump', self._buf, self._pos)
+
+    def _expect(self, chars: str):
+        c = self._peek()
+        if c not in chars:
+            raise json.JSONDecodeError('Expected one of {!r}'.format(chars), self._buf, self._pos)
+        self._pos += 1
+        return c
+
+    def _decode(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A value running up to the end of the buffer (e.g. a number) may be cut off
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+
+def load_table_items(itemtype, file_path: str, last_tstamp: int=None, existing_map: dict=None):
+    """Streams a table dump into a key -> item map, building one row at a time.
+
+    With existing_map, only the rows changed after last_tstamp are applied on
+    top of a copy of it; rows missing a TSTAMP are always treated as changed.
+    Items whose key no longer appears in the dump at all are dropped.
+    Returns (item map, raw row count, max TSTAMP, changed row count).
+    """
+    merging = existing_map is not None
+    result_map = dict(existing_map) if merging else {}
+    # Every key in the dump, so rows which vanished from it can be dropped when merging
+    seen_keys = set()
+    key_field = itemtype.key_field() if merging else None
+    row_count, max_tstamp, changed_count = 0, 0, 0
+    with open(file_path, encoding='utf-8') as f:
+        for raw_item in JsonItemStream(f):
+            row_count += 1
+            tstamp = int_or_none(raw_item.get('TSTAMP'))
+            if tstamp is not None:
+                max_tstamp = max(max_tstamp, tstamp)
+                if merging and tstamp <= last_tstamp:
+                    seen_keys.add(int(raw_item[key_field]))
+                    continue
+
+            changed_count += 1
+            item = itemtype(raw_item)
+            if merging:
+                seen_keys.add(item.key())
+            if not item.deleted():
+                result_map[item.key()] = item
+            elif merging:
+                result_map.pop(item.key(), None)
+
+    if merging:
+        for key in existing_map.keys() - seen_keys:
+            del result_map[key]
+            changed_count += 1
+
+    return result_map, row_count, max_tstamp, changed_count
+
+
+def load_table_items_eager(itemtype, file_path: str):
+    """The old whole-file loader, kept as the baseline for benchmark_table_loaders."""
+    raw_items = dataIO.load_json(file_path)['items']
+    item_list = [itemtype(item) for item in raw_items]
+    result_map = {item.key(): item for item in item_list if not item.deleted()}
+    max_tstamp = max([int_or_none(item.get('TSTAMP')) or 0 for item in raw_items] or [0])
+    return result_map, len(raw_items), max_tstamp, len(raw_items)
+
+
+def write_benchmark_dump(file_path: str, row_count: int):
+    """Writes a synthetic dungeonMonsterList shaped dump with row_count rows."""
+    rng = random.Random(row_count)
+    items = [{
+        'TDM_SEQ': str(i),
+        'DROP_NO': str(rng.randint(1, 4000)),
+        'MONSTER_NO': str(rng.randint(1, 4000)),
+        'DUNGEON_SEQ': str(rng.randint(1, 3000)),
+        'TSD_SEQ': str(rng.randint(1, 20)),
+        'TSTAMP': str(1480298353178 + i),
+    } for i in range(1, row_count + 1)]
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({'items': items}, f)
+
+
+def benchmark_table_loaders(row_count: int, trace_memory: bool=False):
+    """Compares the eager and streaming loaders on a synthetic dump.
+
+    tracemalloc traces every thread in the process, so trace_memory slows down
+    everything else running meanwhile and counts its allocations too.
+    Returns a list of (loader name, wall seconds, peak traced bytes or None, item count).
+    """
+    write_benchmark_dump(BENCHMARK_FILE_PATH, row_count)
+    loaders = [
+        ('eager', load_table_items_eager),
+        ('streaming', load_table_items),
+    ]
+    results = []
+    try:
+        for name, loader in loaders:
+            gc.collect()
+            peak_bytes = None
+            if trace_memory:
+                tracemalloc.start()
+            start_time = time.time()
+            item_map = loader(PgDungeonMonster, BENCHMARK_FILE_PATH)[0]
+            secs = time.time() - start_time
+            if trace_memory:
+                _, peak_bytes = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            results.append((name, secs, peak_bytes, len(item_map)))
+            del item_map
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        os.remove(BENCHMARK_FILE_PATH)
+    return results
+
+
+def load_snapshot_tables():
+    """Loads the file_name -> snapshot entry map, or empty if unusable."""
+    if not os.path.exists(SNAPSHOT_FILE_PATH):
+        return {}
+    try:
+        with open(SNAPSHOT_FILE_PATH, 'rb') as f:
+            # Check the version before unpickling items whose slots may have changed
+            version = pickle.load(f)
+            if version != SNAPSHOT_VERSION:
+                print('PadGuide2 snapshot version mismatch, ignoring it')
+                return {}
+            return pickle.load(f)
+    except Exception as ex:
+        print('PadGuide2 snapshot is corrupt, falling back to JSON', ex)
+        return {}
+
+
+def save_snapshot_tables(tables: dict):
+    tmp_file_path = SNAPSHOT_FILE_PATH + '.tmp'
+    try:
+        with open(tmp_file_path, 'wb') as f:
+            pickle.dump(SNAPSHOT_VERSION, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file_path, SNAPSHOT_FILE_PATH)
+    except Exception as ex:
+        print('Failed to write PadGuide2 snapshot', ex)
+        traceback.print_exc()
 
 
 class PgItem(object):
@@ -490,36 +1199,41 @@ class PgItem(object):
 
     You must call super().__init__() in your constructor.
     You must override key() and load().
+    You must override key_field() unless incremental() is False.
+    You must override dependencies() if load() uses another table's linked data.
+    You must declare every attribute in __slots__; there are a lot of these so no __dict__.
     """
 
+    __slots__ = ()
+
     def __init__(self):
-        self._loaded = False
+        pass
 
     def key(self):
         """Used to look up an item by id."""
         raise NotImplementedError()
 
+    @staticmethod
+    def key_field():
+        """The raw JSON field key() is parsed from, read without building the item."""
+        raise NotImplementedError()
+
     def deleted(self):
         """Is this item marked for deletion. Discard if true. Not all items can be deleted."""
         return False
 
-    def ensure_loaded(self, database: PgRawDatabase):
-        """Ensures that the dependencies have been loaded, or loads them."""
-        if not self._loaded:
-            self._loaded = True
-            self._loading_error = False
-            try:
-                self.load(database)
-            except Exception as ex:
-                self._loading_error = False
-                print('Error occurred while loading item')
-                print(type(self), 'key=', self.key())
-                traceback.print_exc()
+    @staticmethod
+    def incremental():
+        """Can changed rows be merged into the previous load using TSTAMP."""
+        return True
 
-        return self
+    @staticmethod
+    def dependencies():
+        """PgItem types whose tables are referenced by load(); those are linked first."""
+        return ()
 
     def load(self, database: PgRawDatabase):
-        """Override to inject dependencies."""
+        """Override to inject dependencies. Called once per item, table by table."""
         raise NotImplementedError()
 
     def finalize(self):
@@ -546,10 +1260,18 @@ class Attribute(Enum):
 #     "TSTAMP": "1372947975226"
 # },
 class PgAttribute(PgItem):
+    __slots__ = (
+        'ta_seq', 'name', 'value',
+    )
+
     @staticmethod
     def file_name():
         return 'attributeList'
 
+    @staticmethod
+    def key_field():
+        return 'TA_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.ta_seq = int(item['TA_SEQ'])  # unique id
@@ -575,10 +1297,22 @@ class PgAttribute(PgItem):
 #     "TS_SEQ": "2769"
 # },
 class PgAwakening(PgItem):
+    __slots__ = (
+        'tma_seq', 'ts_seq', 'deleted_yn', 'monster_no', 'order', 'is_super', 'skill', 'monster',
+    )
+
     @staticmethod
     def file_name():
         return 'awokenSkillList'
 
+    @staticmethod
+    def key_field():
+        return 'TMA_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgSkill, PgMonster)
+
     def __init__(self, item):
         super().__init__()
         self.tma_seq = int(item['TMA_SEQ'])  # unique id
@@ -626,10 +1360,18 @@ class PgAwakening(PgItem):
 #     "TSTAMP": "1373289123410"
 # },
 class PgDungeon(PgItem):
+    __slots__ = (
+        'dungeon_seq', 'dungeon_type', 'name', 'name_jp', 'tdt_seq', 'show_yn',
+    )
+
     @staticmethod
     def file_name():
         return 'dungeonList'
 
+    @staticmethod
+    def key_field():
+        return 'DUNGEON_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.dungeon_seq = int(item['DUNGEON_SEQ'])
@@ -662,10 +1404,22 @@ class PgDungeon(PgItem):
 # },
 # Seems to be dedicated skillups only, like collab drops
 class PgDungeonMonsterDrop(PgItem):
+    __slots__ = (
+        'tdmd_seq', 'monster_no', 'status', 'tdm_seq', 'monster', 'dungeon_monster',
+    )
+
     @staticmethod
     def file_name():
         return 'dungeonMonsterDropList'
 
+    @staticmethod
+    def key_field():
+        return 'TDMD_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgMonster, PgDungeonMonster)
+
     def __init__(self, item):
         super().__init__()
         self.tdmd_seq = int(item['TDMD_SEQ'])  # unique id
@@ -708,10 +1462,23 @@ class PgDungeonMonsterDrop(PgItem):
 #     "TURN": "1"
 # },
 class PgDungeonMonster(PgItem):
+    __slots__ = (
+        'tdm_seq', 'drop_monster_no', 'monster_no', 'dungeon_seq', 'tsd_seq', 'drop_monster',
+        'monster', 'dungeon',
+    )
+
     @staticmethod
     def file_name():
         return 'dungeonMonsterList'
 
+    @staticmethod
+    def key_field():
+        return 'TDM_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgMonster, PgDungeon)
+
     def __init__(self, item):
         super().__init__()
         self.tdm_seq = int(item['TDM_SEQ'])  # unique id
@@ -753,10 +1520,23 @@ class EvoType(Enum):
 #     "TV_TYPE": "0"
 # },
 class PgEvolution(PgItem):
+    __slots__ = (
+        'tv_seq', 'from_monster_no', 'to_monster_no', 'tv_type', 'evo_type', 'from_monster',
+        'to_monster',
+    )
+
     @staticmethod
     def file_name():
         return 'evolutionList'
 
+    @staticmethod
+    def key_field():
+        return 'TV_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgMonster,)
+
     def __init__(self, item):
         super().__init__()
         self.tv_seq = int(item['TV_SEQ'])  # unique id
@@ -792,10 +1572,22 @@ class PgEvolution(PgItem):
 #     "TV_SEQ": "332"
 # },
 class PgEvolutionMaterial(PgItem):
+    __slots__ = (
+        'tem_seq', 'tv_seq', 'fodder_monster_no', 'order', 'evolution', 'fodder_monster',
+    )
+
     @staticmethod
     def file_name():
         return 'evoMaterialList'
 
+    @staticmethod
+    def key_field():
+        return 'TEM_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgEvolution, PgMonster)
+
     def __init__(self, item):
         super().__init__()
         self.tem_seq = int(item['TEM_SEQ'])  # unique id
@@ -842,10 +1634,18 @@ class PgMonsterAddInfo(PgItem):
 
     Data is copied into PgMonster and this is discarded."""
 
+    __slots__ = (
+        'monster_no', 'sub_type', 'extra_val_1',
+    )
+
     @staticmethod
     def file_name():
         return 'monsterAddInfoList'
 
+    @staticmethod
+    def key_field():
+        return 'MONSTER_NO'
+
     def __init__(self, item):
         super().__init__()
         self.monster_no = int(item['MONSTER_NO'])
@@ -879,10 +1679,22 @@ class PgMonsterInfo(PgItem):
 
     Data is copied into PgMonster and this is discarded."""
 
+    __slots__ = (
+        'monster_no', 'on_na', 'tsr_seq', 'in_pem', 'in_rem', 'history_us', 'series',
+    )
+
     @staticmethod
     def file_name():
         return 'monsterInfoList'
 
+    @staticmethod
+    def key_field():
+        return 'MONSTER_NO'
+
+    @staticmethod
+    def dependencies():
+        return (PgSeries,)
+
     def __init__(self, item):
         super().__init__()
         self.monster_no = int(item['MONSTER_NO'])
@@ -937,10 +1749,33 @@ class PgMonsterInfo(PgItem):
 #     "TT_SEQ_SUB": "1"
 # }
 class PgMonster(PgItem):
+    __slots__ = (
+        'monster_no', 'monster_no_na', 'monster_no_jp', 'min_hp', 'min_atk', 'min_rcv', 'hp',
+        'atk', 'rcv', 'ts_seq_active', 'ts_seq_leader', 'rarity', 'cost', 'exp', 'max_level',
+        'name_na', 'name_jp', 'ta_seq_1', 'ta_seq_2', 'te_seq', 'tt_seq_1', 'tt_seq_2',
+        'debug_info', 'weighted_stats', 'roma_subname', 'active_skill', 'leader_skill',
+        'cur_evo_type', 'evo_to', 'evo_from', 'mats_for_evo', 'material_of', 'awakenings',
+        'drop_dungeons', 'alt_evos', 'rotating_skillups', 'rotation_schedule', 'is_equip',
+        'base_monster', 'limitbreak_stats',
+        'superawakening_count', 'leader_skill_data', 'attr1', 'attr2', 'type1', 'type2', 'type3',
+        'assist_setting', 'on_na', 'series', 'is_gfe', 'in_pem', 'in_rem', 'pem_evo', 'rem_evo',
+        'history_us', 'sell_mp', 'buy_mp', 'in_mpshop', 'mp_evo', 'farmable', 'farmable_evo',
+        'is_inheritable', 'types', 'search',
+    )
+
     @staticmethod
     def file_name():
         return 'monsterList'
 
+    @staticmethod
+    def key_field():
+        return 'MONSTER_NO'
+
+    @staticmethod
+    def dependencies():
+        return (PgSkill, PgSkillLeaderData, PgAttribute, PgType, PgMonsterAddInfo, PgMonsterInfo,
+                PgSeries, PgMonsterPrice)
+
     def __init__(self, item):
         super().__init__()
         self.monster_no = int(item['MONSTER_NO'])
@@ -994,8 +1829,6 @@ class PgMonster(PgItem):
 
         # List of PgSkillRotationDated
         self.rotating_skillups = []
-        self.server_actives = {}  # str(NA, JP) -> PgSkill
-        self.future_skillup_rotation = {}
 
         self.is_equip = False
 
@@ -1010,7 +1843,24 @@ class PgMonster(PgItem):
     def key(self):
         return self.monster_no
 
+    @property
+    def server_actives(self):
+        """str(NA, JP) -> PgSkill currently active on that server."""
+        if self.rotation_schedule is None:
+            return {}
+        return self.rotation_schedule.server_actives(self.monster_no)
+
+    @property
+    def future_skillup_rotation(self):
+        """str(NA, JP) -> next PgSkillRotationDated on that server."""
+        if self.rotation_schedule is None:
+            return {}
+        return self.rotation_schedule.server_next_rotations(self.monster_no)
+
     def load(self, database: PgRawDatabase):
+        # Set by the SkillRotationSchedule if this monster rotates
+        self.rotation_schedule = None  # type: SkillRotationSchedule
+
         self.active_skill = database.getSkill(self.ts_seq_active)
         if self.active_skill:
             self.active_skill.monsters_with_active.append(self)
@@ -1079,21 +1929,6 @@ class PgMonster(PgItem):
 
         self.search = MonsterSearchHelper(self)
 
-        # Compute server skill rotations
-        for server, server_tz in {'JP': rpadutils.JP_TZ_OBJ, 'NA': rpadutils.NA_TZ_OBJ}.items():
-            server_now = datetime.now().replace(tzinfo=server_tz).date()
-            server_skillups = list(filter(lambda s: s.skill_rotation.server == server,
-                                          self.rotating_skillups))
-            future_skillup = list(filter(lambda s: server_now < s.rotation_date, server_skillups))
-            if future_skillup:
-                self.future_skillup_rotation[server] = future_skillup[0]
-
-            past_skillups = list(filter(lambda s: server_now >= s.rotation_date, server_skillups))
-            if past_skillups:
-                active_skillup = max(past_skillups, key=lambda s: s.rotation_date)
-                self.server_actives[server] = active_skillup.skill
-                active_skillup.skill.server_skillups[server] = active_skillup.skill_rotation.monster
-
 
 class MonsterSearchHelper(object):
     def __init__(self, m: PgMonster):
@@ -1199,6 +2034,142 @@ class MonsterSearchHelper(object):
                             self.orb_convert[so].append(do)
 
 
+class MonsterColumnStore(object):
+    """The searchable numeric and categorical monster data as NumPy columns.
+
+    Row i of every column describes monsters[i]. Values come from each monster's
+    MonsterSearchHelper, with 0 standing in for missing numbers. Colors and types
+    are bitmask columns; color_bits and type_bits map names to their bits. Skill
+    search text is indexed by SkillTextIndex, once per distinct skill.
+    """
+
+    def __init__(self, monsters):
+        self.monsters = monsters
+        searches = [m.search for m in monsters]
+
+        self.hp = np.array([s.hp or 0 for s in searches], dtype=np.float64)
+        self.atk = np.array([s.atk or 0 for s in searches], dtype=np.float64)
+        self.rcv = np.array([s.rcv or 0 for s in searches], dtype=np.float64)
+        self.weighted_stats = np.array([s.weighted_stats or 0 for s in searches], dtype=np.float64)
+        self.active_min = np.array([s.active_min or 0 for s in searches], dtype=np.int64)
+
+        self.farmable_evo = np.array([bool(m.farmable_evo) for m in monsters], dtype=bool)
+        self.is_inheritable = np.array([bool(m.is_inheritable) for m in monsters], dtype=bool)
+
+        self.color_bits = {}
+        self.color = self._bitmask_column([s.color for s in searches], self.color_bits)
+        self.hascolor = self._bitmask_column([s.hascolor for s in searches], self.color_bits)
+        self.type_bits = {}
+        self.types = self._bitmask_column([s.types for s in searches], self.type_bits)
+
+        # Skill search text only depends on the skill, so each distinct skill is
+        # indexed once; the skill columns map every row to its skill's index row
+        self.active_skill, active_searches = self._skill_column(monsters, 'active_skill')
+        self.leader_skill, leader_searches = self._skill_column(monsters, 'leader_skill')
+        self.skill_text = {
+            'active': (self.active_skill, SkillTextIndex([s.active for s in active_searches])),
+            'active_desc': (self.active_skill, SkillTextIndex([s.active_desc for s in active_searches])),
+            'leader': (self.leader_skill, SkillTextIndex([s.leader for s in leader_searches])),
+        }
+
+    @staticmethod
+    def _bitmask_column(value_lists, bits: dict):
+        column = np.zeros(len(value_lists), dtype=np.uint64)
+        for row, values in enumerate(value_lists):
+            mask = 0
+            for value in values:
+                if value not in bits:
+                    if len(bits) == 64:
+                        raise ValueError('Too many distinct values for a bitmask column')
+                    bits[value] = 1 << len(bits)
+                mask |= bits[value]
+            column[row] = mask
+        return column
+
+    @staticmethod
+    def _skill_column(monsters, attr: str):
+        """Numbers each distinct skill (including none) in order of first use.
+
+        Returns the column of skill numbers, and the search helper of the first
+        monster seen with each skill.
+        """
+        skill_rows = {}
+        searches = []
+        column = np.zeros(len(monsters), dtype=np.int32)
+        for row, m in enumerate(monsters):
+            skill = getattr(m, attr)
+            key = skill.ts_seq if skill else None
+            if key not in skill_rows:
+                skill_rows[key] = len(searches)
+                searches.append(m.search)
+            column[row] = skill_rows[key]
+        return column, searches
+
+    def skill_text_contains(self, field: str, text: str):
+        """Mask of the rows whose 'active', 'active_desc' or 'leader' search text contains text."""
+        skill_column, index = self.skill_text[field]
+        return index.contains(text)[skill_column]
+
+    def has_any(self, column, bits: dict, names):
+        """Mask of the rows whose bitmask column has any of the named bits set."""
+        mask = 0
+        for name in names:
+            mask |= bits.get(name, 0)
+        return (column & np.uint64(mask)) != 0
+
+    def rows(self, mask):
+        """The monsters for the rows set in mask, in store order."""
+        return [self.monsters[i] for i in np.flatnonzero(mask)]
+
+
+class SkillTextIndex(object):
+    """Trigram inverted index over a list of texts, for substring searches.
+
+    Any text containing the query contains all of its trigrams, so intersecting
+    their posting lists narrows the rows down to candidates, which are then
+    confirmed with a plain substring check.
+    """
+
+    GRAM_SIZE = 3
+    # Intersecting more than the rarest few posting lists rarely pays for itself
+    MAX_POSTING_LISTS = 3
+
+    def __init__(self, texts):
+        self.texts = texts
+        postings = defaultdict(list)
+        for row, text in enumerate(texts):
+            for gram in self._grams(text):
+                postings[gram].append(row)
+        # Rows are appended in order, so each posting list is sorted and unique
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    @classmethod
+    def _grams(cls, text: str):
+        return {text[i:i + cls.GRAM_SIZE] for i in range(len(text) - cls.GRAM_SIZE + 1)}
+
+    def contains(self, text: str):
+        """Boolean array over the texts, set where the text contains text."""
+        result = np.zeros(len(self.texts), dtype=bool)
+        grams = self._grams(text)
+        if not grams:
+            # Too short to index; check every text
+            candidates = range(len(self.texts))
+        elif any(gram not in self.postings for gram in grams):
+            return result
+        else:
+            posting_lists = sorted((self.postings[gram] for gram in grams), key=len)
+            candidates = posting_lists[0]
+            for posting_list in posting_lists[1:self.MAX_POSTING_LISTS]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, posting_list, assume_unique=True)
+            candidates = candidates.tolist()
+
+        texts = self.texts
+        result[[row for row in candidates if text in texts[row]]] = True
+        return result
+
+
 class MonsterGroup(object):
     """Computes shared values across a tree of monsters and injects them."""
 
@@ -1241,10 +2212,18 @@ class MonsterGroup(object):
 
 
 class PgMonsterPrice(PgItem):
+    __slots__ = (
+        'monster_no', 'buy_mp', 'sell_mp',
+    )
+
     @staticmethod
     def file_name():
         return 'monsterPriceList'
 
+    @staticmethod
+    def key_field():
+        return 'MONSTER_NO'
+
     def __init__(self, item):
         super().__init__()
         self.monster_no = int(item['MONSTER_NO'])
@@ -1269,10 +2248,18 @@ class PgMonsterPrice(PgItem):
 #     "TSTAMP": "1380587210667"
 # },
 class PgSeries(PgItem):
+    __slots__ = (
+        'tsr_seq', 'name', 'deleted_yn', 'monsters',
+    )
+
     @staticmethod
     def file_name():
         return 'seriesList'
 
+    @staticmethod
+    def key_field():
+        return 'TSR_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.tsr_seq = int(item['TSR_SEQ'])
@@ -1320,10 +2307,19 @@ class PgSeries(PgItem):
 #     "T_CONDITION": "3"
 # }
 class PgSkill(PgItem):
+    __slots__ = (
+        'ts_seq', 'name', 'desc', 'turn_min', 'turn_max', 'monsters_with_active',
+        'monsters_with_leader', 'monsters_with_awakening', 'rotation_schedule',
+    )
+
     @staticmethod
     def file_name():
         return 'skillList'
 
+    @staticmethod
+    def key_field():
+        return 'TS_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.ts_seq = int(item['TS_SEQ'])
@@ -1336,14 +2332,19 @@ class PgSkill(PgItem):
         self.monsters_with_leader = []  # PgMonster
         self.monsters_with_awakening = []  # PgMonster
 
-        # str (NA, JP) -> PgMonster
-        self.server_skillups = {}
-
     def key(self):
         return self.ts_seq
 
+    @property
+    def server_skillups(self):
+        """str(NA, JP) -> PgMonster currently rotating this skill on that server."""
+        if self.rotation_schedule is None:
+            return {}
+        return self.rotation_schedule.server_skillups(self.ts_seq)
+
     def load(self, database: PgRawDatabase):
-        pass
+        # Set by the SkillRotationSchedule if this skill rotates
+        self.rotation_schedule = None  # type: SkillRotationSchedule
 
 
 # skillLeaderDataList
@@ -1376,6 +2377,10 @@ class PgSkill(PgItem):
 #     "TS_SEQ": "10835"
 # },
 class PgSkillLeaderData(PgItem):
+    __slots__ = (
+        'ts_seq', 'leader_data', 'hp', 'atk', 'rcv', 'resist',
+    )
+
     @staticmethod
     def empty():
         return PgSkillLeaderData({
@@ -1387,6 +2392,10 @@ class PgSkillLeaderData(PgItem):
     def file_name():
         return 'skillLeaderDataList'
 
+    @staticmethod
+    def key_field():
+        return 'TS_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.ts_seq = int(item['TS_SEQ'])  # unique id
@@ -1433,15 +2442,27 @@ class PgSkillLeaderData(PgItem):
 #     "TSTAMP": "1481627094573"
 # }
 class PgSkillRotation(PgItem):
+    __slots__ = (
+        'tsr_seq', 'monster_no', 'server', 'status', 'monster',
+    )
+
     @staticmethod
     def file_name():
         return 'skillRotationList'
 
+    @staticmethod
+    def key_field():
+        return 'TSR_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgMonster,)
+
     def __init__(self, item):
         super().__init__()
         self.tsr_seq = int(item['TSR_SEQ'])  # unique id
         self.monster_no = int(item['MONSTER_NO'])
-        self.server = normalizeServer(item['SERVER'])  # JP, NA, KR
+        self.server = sys.intern(normalizeServer(item['SERVER']))  # JP, NA, KR
         # Status seems to be rarely '2'
         self.status = int(item['STATUS'])
 
@@ -1465,16 +2486,29 @@ class PgSkillRotation(PgItem):
 #     "TS_SEQ": "9926"
 # }
 class PgSkillRotationDated(PgItem):
+    __slots__ = (
+        'tsrl_seq', 'tsr_seq', 'ts_seq', 'rotation_date_str', 'rotation_date', 'skill',
+        'skill_rotation',
+    )
+
     @staticmethod
     def file_name():
         return 'skillRotationListList'
 
+    @staticmethod
+    def key_field():
+        return 'TSRL_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgSkill, PgSkillRotation)
+
     def __init__(self, item):
         super().__init__()
         self.tsrl_seq = int(item['TSRL_SEQ'])  # unique id
         self.tsr_seq = int(item['TSR_SEQ'])  # PgSkillRotation id - Current skillup monster
         self.ts_seq = int(item['TS_SEQ'])  # PGSkill id - Current skill
-        self.rotation_date_str = item['ROTATION_DATE']
+        self.rotation_date_str = sys.intern(item['ROTATION_DATE'])
 
         self.rotation_date = None
         if len(self.rotation_date_str):
@@ -1491,6 +2525,164 @@ class PgSkillRotationDated(PgItem):
             self.skill_rotation.monster.rotating_skillups.append(self)
 
 
+ROTATION_SERVER_TZS = {
+    'JP': rpadutils.JP_TZ_OBJ,
+    'NA': rpadutils.NA_TZ_OBJ,
+}
+
+
+def server_today(server: str, when: datetime=None):
+    """The calendar date on the server at `when` (default now); rotations flip at server midnight."""
+    server_tz = ROTATION_SERVER_TZS[server]
+    if when is None:
+        return datetime.now(server_tz).date()
+    if when.tzinfo is None:
+        when = pytz.utc.localize(when)
+    return when.astimezone(server_tz).date()
+
+
+class SkillRotationSchedule(object):
+    """Every dated skill rotation, sorted by date per server.
+
+    Built once per database generation. Lookups bisect on the server's
+    current date, so the answers roll over at midnight without a rebuild.
+    """
+
+    def __init__(self, dated_rotations):
+        # server -> monster_no -> ([rotation dates], [PgSkillRotationDated])
+        self._monster_rotations = {server: {} for server in ROTATION_SERVER_TZS}
+        # server -> ts_seq -> ([start dates], [(end date or None, PgSkillRotationDated)])
+        self._skill_rotations = {server: {} for server in ROTATION_SERVER_TZS}
+        # server -> sorted distinct rotation dates
+        self._rotation_dates = {server: [] for server in ROTATION_SERVER_TZS}
+        # server -> rotation date -> [PgSkillRotationDated]
+        self._rotations_by_date = {server: defaultdict(list) for server in ROTATION_SERVER_TZS}
+        # server -> ([first rotation dates], [PgMonster]), sorted by date
+        self._first_rotations = {server: ([], []) for server in ROTATION_SERVER_TZS}
+        # server -> (date, [PgMonster]) cached for the last date asked about
+        self._rotating_monsters_cache = {}
+
+        by_monster = defaultdict(list)
+        for dated in dated_rotations:
+            rotation = dated.skill_rotation
+            # Rotations for monsters missing from monsterList were already counted as dangling
+            if not rotation or not rotation.monster or not dated.skill or not dated.rotation_date:
+                continue
+            if rotation.server not in ROTATION_SERVER_TZS:
+                continue
+            by_monster[(rotation.server, rotation.monster.monster_no)].append(dated)
+
+        by_skill = defaultdict(list)
+        first_rotations = defaultdict(list)
+        for (server, monster_no), rotations in by_monster.items():
+            rotations.sort(key=lambda r: (r.rotation_date, r.tsrl_seq))
+            dates = [r.rotation_date for r in rotations]
+            self._monster_rotations[server][monster_no] = (dates, rotations)
+
+            monster = rotations[0].skill_rotation.monster
+            monster.rotation_schedule = self
+            first_rotations[server].append((dates[0], monster_no, monster))
+
+            # Each rotation is active until the next one for the same monster
+            for idx, dated in enumerate(rotations):
+                end_date = dates[idx + 1] if idx + 1 < len(dates) else None
+                by_skill[(server, dated.ts_seq)].append((dated.rotation_date, end_date, dated))
+                self._rotations_by_date[server][dated.rotation_date].append(dated)
+                dated.skill.rotation_schedule = self
+
+        for (server, ts_seq), entries in by_skill.items():
+            entries.sort(key=lambda e: e[0])
+            self._skill_rotations[server][ts_seq] = ([e[0] for e in entries],
+                                                     [(e[1], e[2]) for e in entries])
+
+        for server in ROTATION_SERVER_TZS:
+            self._rotation_dates[server] = sorted(self._rotations_by_date[server].keys())
+            firsts = sorted(first_rotations[server], key=lambda f: (f[0], f[1]))
+            self._first_rotations[server] = ([f[0] for f in firsts], [f[2] for f in firsts])
+
+    def active_rotation(self, monster_no: int, server: str, when: datetime=None):
+        """The PgSkillRotationDated in effect for the monster, or None."""
+        entry = self._monster_rotations[server].get(monster_no)
+        if not entry:
+            return None
+        dates, rotations = entry
+        idx = bisect.bisect_right(dates, server_today(server, when))
+        return rotations[idx - 1] if idx else None
+
+    def next_rotation(self, monster_no: int, server: str, when: datetime=None):
+        """The first PgSkillRotationDated for the monster after today, or None."""
+        entry = self._monster_rotations[server].get(monster_no)
+        if not entry:
+            return None
+        dates, rotations = entry
+        idx = bisect.bisect_right(dates, server_today(server, when))
+        return rotations[idx] if idx < len(rotations) else None
+
+    def active_skill(self, monster_no: int, server: str, when: datetime=None):
+        """The PgSkill the monster currently skills up on the server, or None."""
+        dated = self.active_rotation(monster_no, server, when)
+        return dated.skill if dated else None
+
+    def server_actives(self, monster_no: int, when: datetime=None):
+        result = {}
+        for server in ROTATION_SERVER_TZS:
+            skill = self.active_skill(monster_no, server, when)
+            if skill:
+                result[server] = skill
+        return result
+
+    def server_next_rotations(self, monster_no: int, when: datetime=None):
+        result = {}
+        for server in ROTATION_SERVER_TZS:
+            dated = self.next_rotation(monster_no, server, when)
+            if dated:
+                result[server] = dated
+        return result
+
+    def skillup_monster(self, ts_seq: int, server: str, when: datetime=None):
+        """The PgMonster currently rotating the skill on the server, or None."""
+        entry = self._skill_rotations[server].get(ts_seq)
+        if not entry:
+            return None
+        start_dates, rotations = entry
+        today = server_today(server, when)
+        # Walk back from the latest rotation that started, to the one still running
+        for idx in range(bisect.bisect_right(start_dates, today) - 1, -1, -1):
+            end_date, dated = rotations[idx]
+            if end_date is None or today < end_date:
+                return dated.skill_rotation.monster
+        return None
+
+    def server_skillups(self, ts_seq: int, when: datetime=None):
+        result = {}
+        for server in ROTATION_SERVER_TZS:
+            monster = self.skillup_monster(ts_seq, server, when)
+            if monster:
+                result[server] = monster
+        return result
+
+    def rotating_monsters(self, server: str, when: datetime=None):
+        """Every monster which has rotated in as a skillup on the server so far."""
+        today = server_today(server, when)
+        cached = self._rotating_monsters_cache.get(server)
+        if cached is None or cached[0] != today:
+            first_dates, monsters = self._first_rotations[server]
+            cached = (today, monsters[:bisect.bisect_right(first_dates, today)])
+            self._rotating_monsters_cache[server] = cached
+        return list(cached[1])
+
+    def next_rotation_date(self, server: str, when: datetime=None):
+        """The date of the next skill rotation on the server, or None."""
+        dates = self._rotation_dates[server]
+        idx = bisect.bisect_right(dates, server_today(server, when))
+        return dates[idx] if idx < len(dates) else None
+
+    def upcoming_rotations(self, server: str, when: datetime=None):
+        """Every PgSkillRotationDated which starts on the next rotation date."""
+        next_date = self.next_rotation_date(server, when)
+        return list(self._rotations_by_date[server].get(next_date, []))
+
+
 # typeList
 # {
 #     "ORDER_IDX": "2",
@@ -1501,10 +2693,18 @@ class PgSkillRotationDated(PgItem):
 #     "TT_SEQ": "10"
 # },
 class PgType(PgItem):
+    __slots__ = (
+        'tt_seq', 'name',
+    )
+
     @staticmethod
     def file_name():
         return 'typeList'
 
+    @staticmethod
+    def key_field():
+        return 'TT_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.tt_seq = int(item['TT_SEQ'])  # unique id
@@ -1555,13 +2755,23 @@ class RemRowType(Enum):
 #            "TYPE": "1"
 #        },
 class PgEggInstance(PgItem):
+    __slots__ = (
+        'server', 'deleted_yn', 'show_yn', 'rem_type', 'tet_seq', 'row_type', 'order',
+        'start_date_str', 'end_date_str', 'egg_name_us', 'egg_monsters', 'start_datetime',
+        'end_datetime', 'open_date_str',
+    )
+
     @staticmethod
     def file_name():
         return 'eggTitleList'
 
+    @staticmethod
+    def key_field():
+        return 'TET_SEQ'
+
     def __init__(self, item):
         super().__init__()
-        self.server = normalizeServer(item['SERVER'])
+        self.server = sys.intern(normalizeServer(item['SERVER']))
         self.deleted_yn = item['DEL_YN']  # Y, N
         self.show_yn = item['SHOW_YN']  # Y, N
         self.rem_type = RemType(int(item['TEC_SEQ']))  # matches RemType
@@ -1569,8 +2779,8 @@ class PgEggInstance(PgItem):
         self.row_type = RemRowType(int(item['TYPE']))  # 0-> row with just name, 1-> row with date
 
         self.order = int(item["ORDER_IDX"])
-        self.start_date_str = item['START_DATE']
-        self.end_date_str = item['END_DATE']
+        self.start_date_str = sys.intern(item['START_DATE'])
+        self.end_date_str = sys.intern(item['END_DATE'])
 
         self.egg_name_us = None
         self.egg_monsters = []
@@ -1618,10 +2828,22 @@ class PgEggInstance(PgItem):
 #            "TSTAMP": "1405245537715"
 #        },
 class PgEggMonster(PgItem):
+    __slots__ = (
+        'deleted_yn', 'monster_no', 'tem_seq', 'tet_seq', 'monster', 'egg_instance',
+    )
+
     @staticmethod
     def file_name():
         return 'eggMonsterList'
 
+    @staticmethod
+    def key_field():
+        return 'TEM_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgMonster, PgEggInstance)
+
     def __init__(self, item):
         super().__init__()
         self.deleted_yn = item['DEL_YN']
@@ -1653,14 +2875,26 @@ class PgEggMonster(PgItem):
 #            "TSTAMP": "1441589491425"
 #        },
 class PgEggName(PgItem):
+    __slots__ = (
+        'name', 'language', 'deleted_yn', 'tetn_seq', 'tet_seq', 'egg_instance',
+    )
+
     @staticmethod
     def file_name():
         return 'eggTitleNameList'
 
+    @staticmethod
+    def key_field():
+        return 'TETN_SEQ'
+
+    @staticmethod
+    def dependencies():
+        return (PgEggInstance,)
+
     def __init__(self, item):
         super().__init__()
         self.name = item['NAME']
-        self.language = item['LANGUAGE']  # US, JP, KR
+        self.language = sys.intern(item['LANGUAGE'])  # US, JP, KR
         self.deleted_yn = item['DEL_YN']  # Y, N
         self.tetn_seq = int(item['TETN_SEQ'])  # primary key
         self.tet_seq = int(item['TET_SEQ'])  # fk to PgEggInstance
@@ -1718,10 +2952,20 @@ def normalizeServer(server):
 #     "URL": ""
 # },
 class PgScheduledEvent(PgItem):
+    __slots__ = (
+        'schedule_seq', 'open_timestamp', 'close_timestamp', 'dungeon_seq', 'event_seq',
+        'event_type', 'server', 'team_data', 'url', 'group', 'open_datetime', 'close_datetime',
+        'dungeon', 'event',
+    )
+
     @staticmethod
     def file_name():
         return 'scheduleList'
 
+    @staticmethod
+    def dependencies():
+        return (PgDungeon, PgEvent)
+
     def __init__(self, item):
         super().__init__()
         self.schedule_seq = int(item['SCHEDULE_SEQ'])
@@ -1733,7 +2977,7 @@ class PgScheduledEvent(PgItem):
         self.event_seq = int(item['EVENT_SEQ'])
         self.event_type = int(item['EVENT_TYPE'])
 
-        self.server = normalizeServer(item['SERVER'])
+        self.server = sys.intern(normalizeServer(item['SERVER']))
 
         self.team_data = int_or_none(item['TEAM_DATA'])
         self.url = item['URL']
@@ -1751,6 +2995,11 @@ class PgScheduledEvent(PgItem):
     def deleted(self):
         return self.server == 'KR'
 
+    @staticmethod
+    def incremental():
+        # Only a rolling window of events is downloaded, old ones must drop out
+        return False
+
     def load(self, database: PgRawDatabase):
         self.dungeon = database.getDungeon(self.dungeon_seq)
         self.event = database.getEvent(self.event_seq) if self.event_seq != '0' else None
@@ -1764,10 +3013,18 @@ class PgScheduledEvent(PgItem):
 #     "TSTAMP": "1370174967128"
 # },
 class PgEvent(PgItem):
+    __slots__ = (
+        'event_seq', 'name',
+    )
+
     @staticmethod
     def file_name():
         return 'eventList'
 
+    @staticmethod
+    def key_field():
+        return 'EVENT_SEQ'
+
     def __init__(self, item):
         super().__init__()
         self.event_seq = int(item['EVENT_SEQ'])
@@ -1803,10 +3060,9 @@ def empty_index():
 
 
 class MonsterIndex(object):
-    def __init__(self, monster_database, nickname_overrides, basename_overrides, accept_filter=None):
+    def __init__(self, monster_database, nickname_overrides, basename_overrides, accept_filter=None,
+                 parent=None):
         # Important not to hold onto anything except IDs here so we don't leak memory
-        monster_groups = monster_database.grouped_monsters
-
         self.attr_short_prefix_map = {
             Attribute.Fire: ['r'],
             Attribute.Water: ['b'],
@@ -1833,12 +3089,66 @@ class MonsterIndex(object):
             175: ['valentines', 'vday'],
         }
 
+        if parent is None:
+            named_monsters = self.compute_named_monsters(
+                monster_database, nickname_overrides, basename_overrides, accept_filter)
+        else:
+            # NamedMonsters don't depend on the filter, so share the parent's (already sorted) ones
+            named_monsters = [nm for nm in parent.all_monsters
+                              if accept_filter is None or accept_filter(monster_database.getMonster(nm.monster_no))]
+
+        self.all_entries = {}
+        self.two_word_entries = {}
+        for nm in named_monsters:
+            self.all_entries.update(dict.fromkeys(nm.final_nicknames, nm))
+            self.two_word_entries.update(dict.fromkeys(nm.final_two_word_nicknames, nm))
+
+        self.all_monsters = named_monsters
+        self.all_na_name_to_monsters = {m.name_na.lower(): m for m in named_monsters}
+        self.monster_no_na_to_named_monster = {m.monster_no_na: m for m in named_monsters}
+        self.monster_no_to_named_monster = {m.monster_no: m for m in named_monsters}
+
+        for nickname, monster_no_na in nickname_overrides.items():
+            nm = self.monster_no_na_to_named_monster.get(monster_no_na)
+            if nm:
+                self.all_entries[nickname] = nm
+
+        # Sorted indexes for the prefix searches in find_monster
+        self.nickname_prefix_index = PrefixIndex(self.all_entries.items())
+        self.entry_monsters = set(self.all_entries.values())
+        self.name_prefix_index = PrefixIndex(
+            [(m.name_na.lower(), m) for m in self.entry_monsters] +
+            [(m.name_jp.lower(), m) for m in self.entry_monsters])
+
+        # The parent's entries and names are a superset of these, so its n-gram index and
+        # close match index can be restricted instead of rebuilt
+        if parent is None:
+            # N-gram index for the name contains searches in find_monster
+            self.name_substring_index = SubstringIndex(
+                [(m.name_na.lower(), m) for m in named_monsters] +
+                [(m.name_jp.lower(), m) for m in named_monsters])
+
+            # Close match fallbacks in find_monster
+            self.nickname_matcher = rpadutils.FuzzyMatcher(self.all_entries.keys())
+            self.na_name_matcher = rpadutils.FuzzyMatcher(self.all_na_name_to_monsters.keys())
+        else:
+            self.name_substring_index = parent.name_substring_index.restricted_to(named_monsters)
+            self.nickname_matcher = parent.nickname_matcher.restricted_to(self.all_entries.keys())
+            self.na_name_matcher = parent.na_name_matcher.restricted_to(self.all_na_name_to_monsters.keys())
+
+        # Normalized query -> find_monster result
+        self.lookup_cache = rpadutils.LruCache(MONSTER_LOOKUP_CACHE_SIZE)
+
+    def init_index(self):
+        pass
+
+    def compute_named_monsters(self, monster_database, nickname_overrides, basename_overrides, accept_filter):
         monster_no_na_to_nicknames = defaultdict(set)
         for nickname, monster_no_na in nickname_overrides.items():
             monster_no_na_to_nicknames[monster_no_na].add(nickname)
 
         named_monsters = []
-        for mg in monster_groups:
+        for mg in monster_database.grouped_monsters:
             group_basename_overrides = basename_overrides.get(mg.base_monster.monster_no_na, [])
             named_mg = NamedMonsterGroup(mg, group_basename_overrides)
             for monster in mg.members:
@@ -1857,27 +3167,7 @@ class MonsterIndex(object):
         def named_monsters_sort(nm: NamedMonster):
             return (not nm.is_low_priority, nm.group_size, nm.monster_no_na)
         named_monsters.sort(key=named_monsters_sort)
-
-        self.all_entries = {}
-        self.two_word_entries = {}
-        for nm in named_monsters:
-            for nickname in nm.final_nicknames:
-                self.all_entries[nickname] = nm
-            for nickname in nm.final_two_word_nicknames:
-                self.two_word_entries[nickname] = nm
-
-        self.all_monsters = named_monsters
-        self.all_na_name_to_monsters = {m.name_na.lower(): m for m in named_monsters}
-        self.monster_no_na_to_named_monster = {m.monster_no_na: m for m in named_monsters}
-        self.monster_no_to_named_monster = {m.monster_no: m for m in named_monsters}
-
-        for nickname, monster_no_na in nickname_overrides.items():
-            nm = self.monster_no_na_to_named_monster.get(monster_no_na)
-            if nm:
-                self.all_entries[nickname] = nm
-
-    def init_index(self):
-        pass
+        return named_monsters
 
     def compute_prefixes(self, m: PgMonster, mg: MonsterGroup):
         prefixes = set()
@@ -1951,9 +3241,113 @@ class MonsterIndex(object):
 
         return prefixes
 
-    def find_monster(self, query):
-        query = rpadutils.rmdiacritics(query).lower().strip()
+    def find_monster(self, query, scan=False):
+        """Returns (NamedMonster, error, debug info).
+
+        With scan=True the indexes and the lookup cache are skipped in favor of
+        scanning every entry; that's only useful for benchmarking.
+        """
+        return self._cached_find_monster(normalize_monster_query(query), scan)
+
+    def find_monsters(self, queries, scan=False):
+        """Returns the find_monster result for each query, in order.
+
+        Queries are normalized once, and queries that normalize the same way
+        are only looked up once.
+        """
+        normalized_queries = [normalize_monster_query(q) for q in queries]
+        results = {q: self._cached_find_monster(q, scan) for q in dict.fromkeys(normalized_queries)}
+        return [results[q] for q in normalized_queries]
+
+    def find_monster_candidates(self, query, k=MONSTER_CANDIDATE_COUNT):
+        """Returns ([(NamedMonster, debug_info, score)], error) with up to k candidates, best first.
+
+        Candidates all come from the first tier that matches, the same one find_monster
+        stops at, so the first one is the monster find_monster picks and debug_info is
+        the same string it returns. Literal tiers score 1.0 and are ranked like
+        pickBestMonster; the close match tiers score their difflib ratio.
+        """
+        query = normalize_monster_query(query)
+        key = (k, query)
+        result = self.lookup_cache.get(key)
+        if result is None:
+            result = self._find_monster_candidates(query, k)
+            self.lookup_cache.put(key, result)
+        return result
+
+    def _find_monster_candidates(self, query, k):
+        def ranked(named_monsters, debug_info):
+            return [(nm, debug_info, 1.0) for nm in heapq.nlargest(k, set(named_monsters), key=named_monster_rank)], None
+
+        if query.isdigit():
+            m = self.monster_no_na_to_named_monster.get(int(query))
+            if m is None:
+                return [], 'Looks like a monster ID but was not found'
+            return [(m, 'ID lookup', 1.0)], None
+
+        if query in self.all_entries:
+            return [(self.all_entries[query], 'Exact nickname', 1.0)], None
+
+        contains_jp = rpadutils.containsJp(query)
+        if len(query) < 2 and contains_jp:
+            return [], 'Japanese queries must be at least 2 characters'
+        elif len(query) < 4 and not contains_jp:
+            return [], 'Your query must be at least 4 letters'
+
+        # Same tiers and debug_info as _find_monster
+        matches = set(self._nickname_prefix_matches(query + ' '))
+        if matches:
+            return ranked(matches, "Space nickname prefix, max of {}".format(len(matches)))
+
+        matches = set(self._nickname_prefix_matches(query))
+        if matches:
+            all_names = ",".join(map(lambda x: x.name_na, matches))
+            return ranked(matches, "Nickname prefix, max of {}, matches=({})".format(len(matches), all_names))
 
+        matches = set(self._name_prefix_matches(query))
+        if matches:
+            return ranked(matches, "Full name, max of {}".format(len(matches)))
+
+        if query in self.two_word_entries:
+            return ranked([self.two_word_entries[query]], "Second-word nickname prefix, max of {}".format(len(matches)))
+
+        name_contains_matches = self._name_contains_matches(query)
+        matches = set(m for m in name_contains_matches if m in self.entry_monsters)
+        if matches:
+            return ranked(matches, 'Full name match on nickname, max of {}'.format(len(matches)))
+
+        matches = set(name_contains_matches)
+        if matches:
+            return ranked(matches, 'Full name match on full list, max of {}'.format(len(matches)))
+
+        close_tiers = [
+            ('Close nickname match', self.nickname_matcher, self.all_entries, .8),
+            ('Close name match', self.na_name_matcher, self.all_na_name_to_monsters, .9),
+        ]
+        for tier, matcher, entries, cutoff in close_tiers:
+            candidates = []
+            seen = set()
+            for score, match in matcher.get_scored_matches(query, n=k, cutoff=cutoff):
+                nm = entries[match]
+                if nm not in seen:
+                    candidates.append((nm, '{} ({})'.format(tier, match), score))
+                    seen.add(nm)
+            if candidates:
+                return candidates, None
+
+        return [], "Could not find a match for: " + query
+
+    def _cached_find_monster(self, query, scan=False):
+        if scan:
+            return self._find_monster(query, scan=True)
+
+        result = self.lookup_cache.get(query)
+        if result is None:
+            result = self._find_monster(query)
+            self.lookup_cache.put(query, result)
+        return result
+
+    def _find_monster(self, query, scan=False):
         # id search
         if query.isdigit():
             m = self.monster_no_na_to_named_monster.get(int(query))
@@ -1978,24 +3372,18 @@ class MonsterIndex(object):
         # TODO: this should be a length-limited priority queue
         matches = set()
         # prefix search for nicknames, space-preceeded, take max id
-        for nickname, m in self.all_entries.items():
-            if nickname.startswith(query + ' '):
-                matches.add(m)
+        matches.update(self._nickname_prefix_matches(query + ' ', scan))
         if len(matches):
             return self.pickBestMonster(matches), None, "Space nickname prefix, max of {}".format(len(matches))
 
         # prefix search for nicknames, take max id
-        for nickname, m in self.all_entries.items():
-            if nickname.startswith(query):
-                matches.add(m)
+        matches.update(self._nickname_prefix_matches(query, scan))
         if len(matches):
             all_names = ",".join(map(lambda x: x.name_na, matches))
             return self.pickBestMonster(matches), None, "Nickname prefix, max of {}, matches=({})".format(len(matches), all_names)
 
         # prefix search for full name, take max id
-        for nickname, m in self.all_entries.items():
-            if (m.name_na.lower().startswith(query) or m.name_jp.lower().startswith(query)):
-                matches.add(m)
+        matches.update(self._name_prefix_matches(query, scan))
         if len(matches):
             return self.pickBestMonster(matches), None, "Full name, max of {}".format(len(matches))
 
@@ -2006,29 +3394,31 @@ class MonsterIndex(object):
         # TODO: refactor 2nd search characteristcs for 2nd word
 
         # full name contains on nickname, take max id
-        for nickname, m in self.all_entries.items():
-            if (query in m.name_na.lower() or query in m.name_jp.lower()):
-                matches.add(m)
+        name_contains_matches = self._name_contains_matches(query, scan)
+        matches.update(m for m in name_contains_matches if m in self.entry_monsters)
         if len(matches):
             return self.pickBestMonster(matches), None, 'Full name match on nickname, max of {}'.format(len(matches))
 
         # full name contains on full monster list, take max id
-
-        for m in self.all_monsters:
-            if (query in m.name_na.lower() or query in m.name_jp.lower()):
-                matches.add(m)
+        matches.update(name_contains_matches)
         if len(matches):
             return self.pickBestMonster(matches), None, 'Full name match on full list, max of {}'.format(len(matches))
 
         # No decent matches. Try near hits on nickname instead
-        matches = difflib.get_close_matches(query, self.all_entries.keys(), n=1, cutoff=.8)
+        if scan:
+            matches = difflib.get_close_matches(query, self.all_entries.keys(), n=1, cutoff=.8)
+        else:
+            matches = self.nickname_matcher.get_close_matches(query, n=1, cutoff=.8)
         if len(matches):
             match = matches[0]
             return self.all_entries[match], None, 'Close nickname match ({})'.format(match)
 
         # Still no decent matches. Try near hits on full name instead
-        matches = difflib.get_close_matches(
-            query, self.all_na_name_to_monsters.keys(), n=1, cutoff=.9)
+        if scan:
+            matches = difflib.get_close_matches(
+                query, self.all_na_name_to_monsters.keys(), n=1, cutoff=.9)
+        else:
+            matches = self.na_name_matcher.get_close_matches(query, n=1, cutoff=.9)
         if len(matches):
             match = matches[0]
             return self.all_na_name_to_monsters[match], None, 'Close name match ({})'.format(match)
@@ -2036,8 +3426,138 @@ class MonsterIndex(object):
         # couldn't find anything
         return None, "Could not find a match for: " + query, None
 
+    def _nickname_prefix_matches(self, prefix: str, scan=False):
+        if scan:
+            return [m for nickname, m in self.all_entries.items() if nickname.startswith(prefix)]
+        return self.nickname_prefix_index.prefix_values(prefix)
+
+    def _name_prefix_matches(self, prefix: str, scan=False):
+        if scan:
+            return [m for m in self.all_entries.values()
+                    if m.name_na.lower().startswith(prefix) or m.name_jp.lower().startswith(prefix)]
+        return self.name_prefix_index.prefix_values(prefix)
+
+    def _name_contains_matches(self, query: str, scan=False):
+        if scan:
+            return [m for m in self.all_monsters
+                    if query in m.name_na.lower() or query in m.name_jp.lower()]
+        return self.name_substring_index.contains_values(query)
+
     def pickBestMonster(self, named_monster_list):
-        return max(named_monster_list, key=lambda x: (not x.is_low_priority, x.rarity, x.monster_no_na))
+        return max(named_monster_list, key=named_monster_rank)
+
+
+def named_monster_rank(nm):
+    """Sort key for picking between monsters that match a query equally well; higher is better."""
+    return (not nm.is_low_priority, nm.rarity, nm.monster_no_na)
+
+
+class PrefixIndex(object):
+    """Sorted (key, value) pairs; finds every value whose key starts with a prefix by bisecting."""
+
+    def __init__(self, items):
+        pairs = sorted(items, key=itemgetter(0))
+        self.keys = [k for k, _ in pairs]
+        self.values = [v for _, v in pairs]
+
+    def prefix_values(self, prefix: str):
+        lo = bisect.bisect_left(self.keys, prefix)
+        upper = prefix_upper_bound(prefix)
+        hi = bisect.bisect_left(self.keys, upper, lo) if upper is not None else len(self.keys)
+        return self.values[lo:hi]
+
+
+class SubstringIndex(object):
+    """Inverted n-gram index for finding every value whose text contains a query.
+
+    Texts are indexed by trigram, and by bigram where the bigram has Japanese
+    in it, since Japanese queries can be 2 characters long. Candidates from
+    the posting lists are confirmed with a real substring check.
+    """
+
+    def __init__(self, items):
+        self.texts = []
+        self.values = []
+        # n-gram -> set of positions in texts/values
+        self.postings = defaultdict(set)
+        for text, value in items:
+            position = len(self.texts)
+            self.texts.append(text)
+            self.values.append(value)
+            for gram in substring_index_grams(text):
+                self.postings[gram].add(position)
+        # Positions this index may return, or None for all of them
+        self.allowed = None
+
+    def restricted_to(self, values):
+        """An index over just the items with these values that shares this one's postings."""
+        wanted = set(values)
+        index = copy.copy(self)
+        index.allowed = {position for position, v in enumerate(self.values) if v in wanted}
+        return index
+
+    def contains_values(self, query: str):
+        grams = substring_index_grams(query)
+        if not grams:
+            # Too short to be covered by the index
+            positions = range(len(self.texts)) if self.allowed is None else sorted(self.allowed)
+            return [self.values[p] for p in positions if query in self.texts[p]]
+
+        posting_lists = sorted((self.postings.get(g, set()) for g in grams), key=len)
+        candidates = set.intersection(*posting_lists)
+        if self.allowed is not None:
+            candidates &= self.allowed
+        return [self.values[p] for p in sorted(candidates) if query in self.texts[p]]
+
+
+def substring_index_grams(text: str):
+    """Every trigram in text, plus bigrams containing Japanese."""
+    grams = {text[i:i + 3] for i in range(len(text) - 2)}
+    if rpadutils.containsJp(text):
+        grams.update(text[i:i + 2] for i in range(len(text) - 1)
+                     if rpadutils.containsJp(text[i:i + 2]))
+    return grams
+
+
+def prefix_upper_bound(prefix: str):
+    """The smallest string greater than every string starting with prefix, or None if unbounded."""
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def normalize_monster_query(query: str):
+    return rpadutils.rmdiacritics(query).lower().strip()
+
+
+def benchmark_find_monster(monster_index: MonsterIndex, queries: list):
+    """Replays queries with and without the indexes, bypassing the lookup cache.
+
+    Returns (scan (total, worst) seconds, indexed (total, worst) seconds,
+    queries whose results differ).
+    """
+    def replay(scan):
+        results = []
+        total_secs, worst_secs = 0.0, 0.0
+        for q in queries:
+            start_time = time.time()
+            results.append(monster_index._find_monster(normalize_monster_query(q), scan=scan))
+            secs = time.time() - start_time
+            total_secs += secs
+            worst_secs = max(worst_secs, secs)
+        return (total_secs, worst_secs), results
+
+    def comparable(result):
+        # The nickname prefix tier lists its matches in set order; compare the rest
+        nm, err, debug_info = result
+        return nm, err, (debug_info or '').split(', matches=')[0]
+
+    scan_secs, scan_results = replay(True)
+    indexed_secs, indexed_results = replay(False)
+    mismatches = [q for q, a, b in zip(queries, scan_results, indexed_results)
+                  if comparable(a) != comparable(b)]
+    return scan_secs, indexed_secs, mismatches
 
 
 class NamedMonsterGroup(object):
@@ -2157,31 +3677,37 @@ class NamedMonster(object):
             if len(basename_words) == 2:
                 self.two_word_basenames.add(basename_words[1])
 
-        # The primary result nicknames
-        self.final_nicknames = set()
+        self.roma_subname = monster.roma_subname
+
+    # The nickname sets are the prefix x basename cross product. Their strings still live on as
+    # the index's all_entries keys (and in the search structures built from them), so this only
+    # saves the per-monster set copies; they're generated on access instead of being stored.
+
+    @property
+    def final_nicknames(self):
+        """The primary result nicknames."""
+        nicknames = compose_nicknames(self.prefixes, self.group_basenames)
         # Set the configured override nicknames
-        self.final_nicknames.update(self.extra_nicknames)
+        nicknames.update(self.extra_nicknames)
         # Set the roma subname for JP monsters
-        if monster.roma_subname:
-            self.final_nicknames.add(monster.roma_subname)
+        if self.roma_subname:
+            nicknames.add(self.roma_subname)
+        return nicknames
 
-        # For each basename, add nicknames
-        for basename in self.group_basenames:
-            # Add the basename directly
-            self.final_nicknames.add(basename)
-            # Add the prefix plus basename, and the prefix with a space between basename
-            for prefix in self.prefixes:
-                self.final_nicknames.add(prefix + basename)
-                self.final_nicknames.add(prefix + ' ' + basename)
-
-        self.final_two_word_nicknames = set()
+    @property
+    def final_two_word_nicknames(self):
         # Slightly different process for two-word basenames. Does this make sense? Who knows.
-        for basename in self.two_word_basenames:
-            self.final_two_word_nicknames.add(basename)
-            # Add the prefix plus basename, and the prefix with a space between basename
-            for prefix in self.prefixes:
-                self.final_two_word_nicknames.add(prefix + basename)
-                self.final_two_word_nicknames.add(prefix + ' ' + basename)
+        return compose_nicknames(self.prefixes, self.two_word_basenames)
+
+
+def compose_nicknames(prefixes, basenames):
+    """Each basename on its own, plus every prefix before it with and without a space."""
+    spaced_prefixes = [prefix + ' ' for prefix in prefixes]
+    nicknames = set(basenames)
+    for basename in basenames:
+        nicknames.update([prefix + basename for prefix in prefixes])
+        nicknames.update([prefix + basename for prefix in spaced_prefixes])
+    return nicknames
 
 
 def compute_killers(*types):
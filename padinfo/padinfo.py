@@ -77,6 +77,17 @@ PDX_JP_ADJUSTMENTS = {}
 PDX_JP_ADJUSTMENTS.update(CROWS_1)
 PDX_JP_ADJUSTMENTS.update(CROWS_2)
 
+# historic_lookups.json is rewritten in the background once this many lookups are
+# pending, or once anything has been pending for HISTORIC_LOOKUPS_FLUSH_SECS
+HISTORIC_LOOKUPS_FLUSH_COUNT = 200
+HISTORIC_LOOKUPS_FLUSH_SECS = 5 * 60
+HISTORIC_LOOKUPS_CHECK_SECS = 10
+# Past this many queries, the least recently seen ones are dropped on flush
+HISTORIC_LOOKUPS_MAX_SIZE = 50000
+
+# How many of the most frequent historic lookups to replay against each new index
+DEFAULT_WARM_LOOKUP_COUNT = 500
+
 
 def get_pdx_url(m):
     pdx_id = m.monster_no_na
@@ -107,6 +118,12 @@ class PadInfo:
 
         self.index_all = padguide2.empty_index()
         self.index_na = padguide2.empty_index()
+        # Skill rotations from the same generation as the indexes
+        self.skill_rotations = padguide2.SkillRotationSchedule([])
+        # PadGuide2 database generation the indexes were built from
+        self.index_generation = None
+        # Held across the index warmup so overlapping refreshes run one at a time
+        self.refresh_lock = asyncio.Lock()
 
         self.menu = Menu(bot)
 
@@ -123,36 +140,72 @@ class PadInfo:
         self.other_info_emoji = '\N{SCROLL}'
 
         self.historic_lookups_file_path = "data/padinfo/historic_lookups.json"
-        if not dataIO.is_valid_json(self.historic_lookups_file_path):
-            print("Creating empty historic_lookups.json...")
-            dataIO.save_json(self.historic_lookups_file_path, {})
-
-        self.historic_lookups = dataIO.load_json(self.historic_lookups_file_path)
+        self.historic_lookups = HistoricLookups(
+            self.historic_lookups_file_path, HISTORIC_LOOKUPS_MAX_SIZE)
+        # (query, na_only, logged monster_no, new monster_no) from the last index warmup
+        self.lookup_changes = []
 
     def __unload(self):
         # Manually nulling out database because the GC for cogs seems to be pretty shitty
         self.index_all = padguide2.empty_index()
         self.index_na = padguide2.empty_index()
-        self.historic_lookups = {}
+        self.skill_rotations = padguide2.SkillRotationSchedule([])
+        try:
+            if self.historic_lookups.pending:
+                self.historic_lookups.flush()
+        except Exception as ex:
+            print("flush historic lookups caught exception " + str(ex))
 
     async def reload_nicknames(self):
         await self.bot.wait_until_ready()
+        try:
+            await self.refresh_index()
+            print('Done refreshing PadInfo')
+        except Exception as ex:
+            print("reload padinfo caught exception " + str(ex))
+            traceback.print_exc()
+
+    async def flush_historic_lookups_loop(self):
         while self == self.bot.get_cog('PadInfo'):
             try:
-                await self.refresh_index()
-                print('Done refreshing PadInfo')
+                if self.historic_lookups.should_flush():
+                    await self.bot.loop.run_in_executor(None, self.historic_lookups.flush)
             except Exception as ex:
-                print("reload padinfo loop caught exception " + str(ex))
-                traceback.print_exc()
+                print("flush historic lookups caught exception " + str(ex))
+            await asyncio.sleep(HISTORIC_LOOKUPS_CHECK_SECS)
 
-            await asyncio.sleep(60 * 60 * 1)
+    async def on_padguide2_generation_changed(self, change):
+        if self != self.bot.get_cog('PadInfo'):
+            return
+        # The indexes hold monsters from the generation they were built from, so
+        # always rebuild; keeping them would keep the whole old database alive
+        await self.reload_nicknames()
 
     async def refresh_index(self):
         """Refresh the monster indexes."""
         pg_cog = self.bot.get_cog('PadGuide2')
         await pg_cog.wait_until_ready()
-        self.index_all = pg_cog.create_index()
-        self.index_na = pg_cog.create_index(lambda m: m.on_na)
+        async with self.refresh_lock:
+            database_handle = pg_cog.get_database_handle()
+            generation = database_handle.generation
+            if generation == self.index_generation:
+                return
+            skill_rotations = database_handle.database.skill_rotations
+            index_all = pg_cog.create_index()
+            index_na = pg_cog.create_index(lambda m: m.on_na, parent=index_all)
+
+            warm_count = self.settings.warmLookupCount()
+            if warm_count:
+                queries = self.historic_lookups.top_queries(warm_count)
+                self.lookup_changes = await self.bot.loop.run_in_executor(
+                    None, warm_monster_index, index_all, index_na, queries)
+                print('Warmed monster indexes with {} lookups, {} resolved differently'.format(
+                    len(queries), len(self.lookup_changes)))
+
+            self.index_all = index_all
+            self.index_na = index_na
+            self.skill_rotations = skill_rotations
+            self.index_generation = generation
 
     def get_monster_by_no(self, monster_no: int):
         pg_cog = self.bot.get_cog('PadGuide2')
@@ -166,10 +219,10 @@ class PadInfo:
             await self.bot.say(inline('Supported servers are NA, JP'))
             return
 
-        pg_cog = self.bot.get_cog('PadGuide2')
-        monsters = pg_cog.database.rotating_skillups(server)
+        schedule = self.skill_rotations
+        monsters = schedule.rotating_monsters(server)
 
-        for page in pagify(monsters_to_rotation_list(monsters, server, self.index_all)):
+        for page in pagify(monsters_to_rotation_list(monsters, server, self.index_all, schedule)):
             await self.bot.say(box(page))
 
     @commands.command(pass_context=True)
@@ -193,9 +246,9 @@ class PadInfo:
         await self._do_id(ctx, query, na_only=True)
 
     async def _do_id(self, ctx, query: str, na_only=False):
-        m, err, debug_info = self.findMonster(query, na_only=na_only)
+        m, err, debug_info, alternatives = self.findMonsterWithAlternatives(query, na_only=na_only)
         if m is not None:
-            await self._do_idmenu(ctx, m, self.id_emoji)
+            await self._do_idmenu(ctx, m, self.id_emoji, alternatives)
         else:
             await self.bot.say(self.makeFailureMsg(err))
 
@@ -239,8 +292,10 @@ class PadInfo:
         else:
             await self.bot.say(self.makeFailureMsg(err))
 
-    async def _do_idmenu(self, ctx, m, starting_menu_emoji):
+    async def _do_idmenu(self, ctx, m, starting_menu_emoji, alternatives=None):
         id_embed = monsterToEmbed(m, self.get_emojis())
+        if alternatives:
+            id_embed.add_field(name='Did you mean', value=namedMonstersToText(alternatives), inline=False)
         evo_embed = monsterToEvoEmbed(m)
         mats_embed = monsterToEvoMatsEmbed(m)
         pic_embed = monsterToPicEmbed(m)
@@ -350,10 +405,10 @@ class PadInfo:
                 left_query = combined_query
                 right_query = None
 
-        left_m, left_err, _ = self.findMonster(left_query)
         if right_query:
-            right_m, right_err, _ = self.findMonster(right_query)
+            (left_m, left_err, _), (right_m, right_err, _) = self.findMonsters([left_query, right_query])
         else:
+            left_m, left_err, _ = self.findMonster(left_query)
             right_m, right_err, = left_m, left_err
 
         err_msg = '{} query failed to match a monster: [ {} ]. If your query is multiple words, wrap it in quotes.'
@@ -392,6 +447,58 @@ class PadInfo:
             self.settings.setEmojiServers(emoji_servers.split(','))
         await self.bot.say(inline('Set {} servers'.format(len(self.settings.emojiServers()))))
 
+    @padinfo.command(pass_context=True)
+    @checks.is_owner()
+    async def benchlookup(self, ctx):
+        """Replays historic lookups with and without the monster indexes"""
+        queries = self.historic_lookups.queries()
+        await self.bot.say(inline('Replaying {} historic lookups'.format(len(queries))))
+        scan_secs, indexed_secs, mismatches = await self.bot.loop.run_in_executor(
+            None, padguide2.benchmark_find_monster, self.index_all, queries)
+
+        msg = ''
+        for name, (total_secs, worst_secs) in [('Scan', scan_secs), ('Indexed', indexed_secs)]:
+            msg += '{}: {:.3f}s ({:.3f}ms/query, worst {:.1f}ms)\n'.format(
+                name, total_secs, 1000 * total_secs / max(len(queries), 1), 1000 * worst_secs)
+        msg += '{} queries returned different results'.format(len(mismatches))
+        if mismatches:
+            msg += ': ' + ', '.join(mismatches[:20])
+        await self.bot.say(box(msg))
+
+    @padinfo.command(pass_context=True)
+    @checks.is_owner()
+    async def lookupcache(self, ctx):
+        """Prints monster lookup cache stats for the current indexes"""
+        msg = 'All: {}\n'.format(self.index_all.lookup_cache.stats_text())
+        msg += 'NA: {}'.format(self.index_na.lookup_cache.stats_text())
+        await self.bot.say(box(msg))
+
+    @padinfo.command(pass_context=True)
+    @checks.is_owner()
+    async def setwarmlookups(self, ctx, count: int):
+        """Sets how many top historic lookups warm each new index (0 to disable)"""
+        self.settings.setWarmLookupCount(count)
+        await self.bot.say(inline('Warming new indexes with the top {} lookups'.format(count)))
+
+    @padinfo.command(pass_context=True)
+    @checks.is_owner()
+    async def lookupchanges(self, ctx):
+        """Prints historic lookups that resolved differently after the last index refresh"""
+        if not self.lookup_changes:
+            await self.bot.say(inline('No lookups changed in the last refresh'))
+            return
+
+        def describe(monster_no):
+            nm = self.index_all.monster_no_to_named_monster.get(monster_no)
+            return '{} {}'.format(monster_no, nm.name_na) if nm else str(monster_no)
+
+        msg = '{} lookups changed\n'.format(len(self.lookup_changes))
+        for query, na_only, old_monster_no, new_monster_no in self.lookup_changes:
+            msg += '{}{}: {} -> {}\n'.format(query, ' (NA)' if na_only else '',
+                                            describe(old_monster_no), describe(new_monster_no))
+        for page in pagify(msg):
+            await self.bot.say(box(page))
+
     def get_emojis(self):
         server_ids = self.settings.emojiServers()
         return [e for s in self.bot.servers if s.id in server_ids for e in s.emojis]
@@ -406,8 +513,7 @@ class PadInfo:
         nm, err, debug_info = self._findMonster(query, na_only)
 
         monster_no = nm.monster_no if nm else -1
-        self.historic_lookups[query] = monster_no
-        dataIO.save_json(self.historic_lookups_file_path, self.historic_lookups)
+        self.historic_lookups.record(query, monster_no, na_only)
 
         m = self.get_monster_by_no(nm.monster_no) if nm else None
 
@@ -417,6 +523,38 @@ class PadInfo:
         monster_index = self.index_na if na_only else self.index_all
         return monster_index.find_monster(query)
 
+    def findMonsterWithAlternatives(self, query, na_only=False):
+        """Exported; like findMonster, plus a list of NamedMonsters the query might have meant instead."""
+        query = rmdiacritics(query)
+        monster_index = self.index_na if na_only else self.index_all
+        candidates, err = monster_index.find_monster_candidates(query)
+
+        nm, debug_info = candidates[0][:2] if candidates else (None, None)
+        monster_no = nm.monster_no if nm else -1
+        self.historic_lookups.record(query, monster_no, na_only)
+
+        m = self.get_monster_by_no(nm.monster_no) if nm else None
+        # Candidates only come from the winning tier, so there are alternatives only when
+        # that tier matched more than one monster
+        alternatives = [alt_nm for alt_nm, _, _ in candidates[1:]]
+
+        return m, err, debug_info, alternatives
+
+    def findMonsters(self, queries, na_only=False):
+        """Exported batch version of findMonster; returns a result per query, in order."""
+        queries = [rmdiacritics(q) for q in queries]
+        results = []
+        for query, (nm, err, debug_info) in zip(queries, self._findMonsters(queries, na_only)):
+            monster_no = nm.monster_no if nm else -1
+            self.historic_lookups.record(query, monster_no, na_only)
+            m = self.get_monster_by_no(nm.monster_no) if nm else None
+            results.append((m, err, debug_info))
+        return results
+
+    def _findMonsters(self, queries, na_only=False):
+        monster_index = self.index_na if na_only else self.index_all
+        return monster_index.find_monsters(queries)
+
     def map_awakenings_text(self, m):
         """Exported for use in other cogs"""
         return _map_awakenings_text(m)
@@ -427,6 +565,7 @@ def setup(bot):
     n = PadInfo(bot)
     bot.add_cog(n)
     bot.loop.create_task(n.reload_nicknames())
+    bot.loop.create_task(n.flush_historic_lookups_loop())
     print('done adding padinfo bot')
 
 
@@ -447,12 +586,96 @@ class PadInfoSettings(CogSettings):
         es.extend(emoji_servers)
         self.save_settings()
 
+    def warmLookupCount(self):
+        return self.bot_settings.get('warm_lookup_count', DEFAULT_WARM_LOOKUP_COUNT)
+
+    def setWarmLookupCount(self, count: int):
+        self.bot_settings['warm_lookup_count'] = count
+        self.save_settings()
+
+
+class HistoricLookups(object):
+    """In-memory log of monster queries, persisted by periodic flushes.
+
+    Each query maps to {'monster_no', 'na_monster_no', 'count', 'last_seen'}, where
+    monster_no is the last result from the full index and na_monster_no the last
+    from the NA-only one; either is missing if the query never went to that index.
+    Lookups can come from other threads (padtwitch), so access goes through a lock.
+    """
+
+    def __init__(self, file_path: str, max_size: int):
+        self.file_path = file_path
+        self.max_size = max_size
+        self.pending = 0
+        self.last_flush = time.time()
+        self._lock = threading.Lock()
+
+        if not dataIO.is_valid_json(self.file_path):
+            print("Creating empty historic_lookups.json...")
+            dataIO.save_json(self.file_path, {})
+        self.lookups = dataIO.load_json(self.file_path)
+        for query, entry in self.lookups.items():
+            # Older files only stored the monster_no
+            if not isinstance(entry, dict):
+                self.lookups[query] = {'monster_no': entry, 'count': 1, 'last_seen': 0}
+
+    def record(self, query: str, monster_no: int, na_only=False):
+        with self._lock:
+            entry = self.lookups.get(query)
+            if entry is None:
+                entry = {'count': 0}
+                self.lookups[query] = entry
+            entry['na_monster_no' if na_only else 'monster_no'] = monster_no
+            entry['count'] += 1
+            entry['last_seen'] = int(time.time())
+            self.pending += 1
+
+    def queries(self):
+        with self._lock:
+            return list(self.lookups.keys())
+
+    def top_queries(self, n: int):
+        """The n most frequent queries as (query, last monster_no, last na_monster_no), None if unlogged."""
+        with self._lock:
+            ranked = sorted(self.lookups.items(),
+                            key=lambda x: (x[1]['count'], x[1]['last_seen']), reverse=True)
+            return [(query, entry.get('monster_no'), entry.get('na_monster_no'))
+                    for query, entry in ranked[:n]]
+
+    def should_flush(self):
+        return self.pending >= HISTORIC_LOOKUPS_FLUSH_COUNT or (
+            self.pending and time.time() - self.last_flush >= HISTORIC_LOOKUPS_FLUSH_SECS)
+
+    def flush(self):
+        """Writes the log to disk; blocking, so run it in an executor from the bot loop."""
+        with self._lock:
+            if len(self.lookups) > self.max_size:
+                stalest = sorted(self.lookups.items(), key=lambda x: (x[1]['last_seen'], x[1]['count']))
+                for query, _ in stalest[:len(self.lookups) - self.max_size]:
+                    del self.lookups[query]
+            data = {query: dict(entry) for query, entry in self.lookups.items()}
+            flushed, self.pending = self.pending, 0
+            self.last_flush = time.time()
+
+        try:
+            # save_json writes to a temp file and renames it over the old one
+            dataIO.save_json(self.file_path, data)
+        except (OSError, ValueError) as ex:
+            print('failed to write {}: {!r}'.format(self.file_path, ex))
+            with self._lock:
+                self.pending += flushed
+            raise
+
 
 def monsterToHeader(m: padguide2.PgMonster, link=False):
     msg = 'No. {} {}'.format(m.monster_no_na, m.name_na)
     return '[{}]({})'.format(msg, get_pdx_url(m)) if link else msg
 
 
+def namedMonstersToText(named_monsters):
+    return ', '.join('No. {} {}'.format(nm.monster_no_na, nm.name_na) for nm in named_monsters)
+
+
 def monsterToJpSuffix(m: padguide2.PgMonster):
     suffix = ""
     if m.roma_subname:
@@ -796,7 +1019,32 @@ def monsterToOtherInfoEmbed(m: padguide2.PgMonster):
     return embed
 
 
-def monsters_to_rotation_list(monster_list, server: str, index_all: padguide2.MonsterIndex):
+def warm_monster_index(index_all: padguide2.MonsterIndex, index_na: padguide2.MonsterIndex, queries):
+    """Replays top_queries() results to fill the new indexes' lookup caches.
+
+    Runs off the bot loop, so it only touches the new indexes. Each logged
+    result is diffed against the index that served it; returns
+    (query, na_only, logged monster_no, new monster_no) for the ones that now
+    resolve differently.
+    """
+    changes = []
+    for query, logged_monster_no, logged_na_monster_no in queries:
+        for na_only, monster_index, logged in [(False, index_all, logged_monster_no),
+                                               (True, index_na, logged_na_monster_no)]:
+            nm, _, _ = monster_index.find_monster(query)
+            # ^id goes through the ranked lookup instead
+            monster_index.find_monster_candidates(query)
+            new_monster_no = nm.monster_no if nm else -1
+            if logged is not None and new_monster_no != logged:
+                changes.append((query, na_only, logged, new_monster_no))
+    # Only count real lookups in the cache stats
+    index_all.lookup_cache.reset_stats()
+    index_na.lookup_cache.reset_stats()
+    return changes
+
+
+def monsters_to_rotation_list(monster_list, server: str, index_all: padguide2.MonsterIndex,
+                              schedule: padguide2.SkillRotationSchedule):
     # Shorten some of the longer names
     name_remap = {
         'Extreme King Metal Tamadra': 'Fat Tama',
@@ -809,15 +1057,11 @@ def monsters_to_rotation_list(monster_list, server: str, index_all: padguide2.Mo
     ]
 
     monster_list.sort(key=lambda m: m.monster_no, reverse=True)
-    next_rotation_date = None
-    for m in monster_list:
-        if server in m.future_skillup_rotation:
-            next_rotation_date = m.future_skillup_rotation[server].rotation_date_str
-            break
+    next_rotation_date = schedule.next_rotation_date(server)
 
     cols = [server + ' Skillup', 'Current']
     if next_rotation_date:
-        cols.append(next_rotation_date)
+        cols.append(next_rotation_date.isoformat())
     tbl = prettytable.PrettyTable(cols)
     tbl.hrules = prettytable.HEADER
     tbl.vrules = prettytable.NONE
@@ -829,7 +1073,7 @@ def monsters_to_rotation_list(monster_list, server: str, index_all: padguide2.Mo
         return name_remap.get(name, name)
 
     for m in monster_list:
-        skill = m.server_actives[server]
+        skill = schedule.active_skill(m.monster_no, server)
 
         sm = skill.monsters_with_active
         # Since some newer monsters like jewel of creation are being used as
@@ -844,8 +1088,9 @@ def monsters_to_rotation_list(monster_list, server: str, index_all: padguide2.Mo
             continue
         row = [skillup_name, cell_name(sm)]
         if next_rotation_date:
-            if server in m.future_skillup_rotation:
-                next_skill = m.future_skillup_rotation[server].skill
+            next_rotation = schedule.next_rotation(m.monster_no, server)
+            if next_rotation:
+                next_skill = next_rotation.skill
                 nm = max(next_skill.monsters_with_active, key=lambda x: x.monster_no)
                 row.append(cell_name(nm))
             else:
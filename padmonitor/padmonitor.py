@@ -19,22 +19,25 @@ class PadMonitor:
         self.bot = bot
         self.settings = PadMonitorSettings("padmonitor")
 
-    async def check_seen_loop(self):
+    async def refresh_seen(self):
         await self.bot.wait_until_ready()
-        while self == self.bot.get_cog('PadMonitor'):
-            try:
-                await self.check_seen()
-                print('Done refreshing PadMonitor')
-            except Exception as ex:
-                print("check seen loop caught exception " + str(ex))
+        try:
+            await self.check_seen()
+            print('Done refreshing PadMonitor')
+        except Exception as ex:
+            print("check seen caught exception " + str(ex))
 
-            await asyncio.sleep(60 * 5)
+    async def on_padguide2_generation_changed(self, change):
+        if self != self.bot.get_cog('PadMonitor'):
+            return
+        if change.tables_changed(padguide2.PgMonster, padguide2.PgMonsterInfo):
+            await self.refresh_seen()
 
     async def check_seen(self):
         """Refresh the monster indexes."""
         pg_cog = self.bot.get_cog('PadGuide2')
         await pg_cog.wait_until_ready()
-        all_monsters = pg_cog.database.all_monsters()
+        all_monsters = pg_cog.get_database_handle().database.all_monsters()
         jp_monster_map = {m.monster_no: m for m in all_monsters}
         na_monster_map = {m.monster_no: m for m in all_monsters if m.on_na}
 
@@ -102,7 +105,7 @@ class PadMonitor:
 def setup(bot):
     n = PadMonitor(bot)
     bot.add_cog(n)
-    bot.loop.create_task(n.check_seen_loop())
+    bot.loop.create_task(n.refresh_seen())
     print('done adding padinfo bot')
 
 
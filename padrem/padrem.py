@@ -1,5 +1,4 @@
 from _collections import OrderedDict
-import asyncio
 from builtins import filter
 from collections import defaultdict
 import csv
@@ -47,27 +46,38 @@ class PadRem:
 
         self.pgrem = PgRemWrapper(None, {}, skip_load=True)
 
+        # PadGuide2 database generation the machines were built from
+        self.pgrem_generation = None
+
     def __unload(self):
         # Manually nulling out database because the GC for cogs seems to be pretty shitty
         self.pgrem = PgRemWrapper(None, {}, skip_load=True)
 
     async def reload_padrem(self):
         await self.bot.wait_until_ready()
-        while self == self.bot.get_cog('PadRem'):
-            try:
-                await self.refresh_data()
-                print('Done refreshing PadRem')
-            except Exception as ex:
-                print("reload padrem loop caught exception " + str(ex))
-                traceback.print_exc()
-
-            await asyncio.sleep(60 * 60 * 1)
+        try:
+            await self.refresh_data()
+            print('Done refreshing PadRem')
+        except Exception as ex:
+            print("reload padrem caught exception " + str(ex))
+            traceback.print_exc()
+
+    async def on_padguide2_generation_changed(self, change):
+        if self != self.bot.get_cog('PadRem'):
+            return
+        # The machines hold monsters from the generation they were built from, so
+        # always rebuild; keeping them would keep the whole old database alive
+        await self.reload_padrem()
 
-    async def refresh_data(self):
+    async def refresh_data(self, force=False):
         pg_cog = self.bot.get_cog('PadGuide2')
         await pg_cog.wait_until_ready()
-        database = pg_cog.database
-        self.pgrem = PgRemWrapper(database, self.settings.getBoosts())
+        database_handle = pg_cog.get_database_handle()
+        if database_handle.generation == self.pgrem_generation and not force:
+            return
+        generation = database_handle.generation
+        self.pgrem = PgRemWrapper(database_handle.database, self.settings.getBoosts())
+        self.pgrem_generation = generation
 
     @commands.command(name="setboost", pass_context=True)
     @checks.is_owner()
@@ -80,10 +90,9 @@ class PadRem:
         Use 711 to set the godfest rate and 561 to set the carnival rate.
 
         The boost_rate should an integer >= 1.
-
-        You will need to reload the module after changing this.
         """
         self.settings.setBoost(machine_id, boost_rate)
+        await self.refresh_data(force=True)
         await self.bot.say(box('Done'))
 
     @commands.command(name="remlist", pass_context=True)
@@ -1,8 +1,10 @@
 import json
 import math
+import time
 
 import discord
 from discord.ext import commands
+import numpy as np
 from ply import lex, yacc
 from png import itertools
 
@@ -10,7 +12,7 @@ from __main__ import user_allowed, send_cmd_help
 
 from . import rpadutils
 from .utils import checks
-from .utils.chat_formatting import box, inline
+from .utils.chat_formatting import box, inline, pagify
 
 HELP_MSG = """
 ^search <specification string>
@@ -89,6 +91,21 @@ ORB_TYPES = [
     'mortal',
 ]
 
+# Rough relative cost of evaluating one filter against one monster
+COST_FIELD = 1  # attribute checks and numeric comparisons
+COST_MEMBERSHIP = 2  # color/type/orb list checks
+COST_TEXT = 3  # substring scans of names
+COST_LONG_TEXT = 5  # substring scans of skill text
+
+# Monsters sampled to estimate how selective each filter is
+PLAN_SAMPLE_SIZE = 200
+# How many times benchsearch repeats each search
+BENCHMARK_RUNS = 20
+# Parsed search specs kept around for repeat searches
+SEARCH_CONFIG_CACHE_SIZE = 500
+# Sorted results kept for repeat searches against the same database generation
+SEARCH_RESULT_CACHE_SIZE = 500
+
 
 def assert_color(value):
     value = replace_named_color(value)
@@ -437,72 +454,79 @@ class SearchConfig(object):
             if type == 'CONVERT':
                 self.convert.append(value)
 
-        self.filters = list()
+        self.predicates = list()
 
         # Single
         if self.cd:
-            self.filters.append(lambda m: m.search.active_min and m.search.active_min <= self.cd)
+            self.add_predicate('cd({})'.format(self.cd), COST_FIELD,
+                               lambda m, cd=self.cd: m.search.active_min and m.search.active_min <= cd,
+                               lambda c, cd=self.cd: (c.active_min != 0) & (c.active_min <= cd))
 
         if self.farmable:
-            self.filters.append(lambda m: m.farmable_evo)
+            self.add_predicate('farmable', COST_FIELD, lambda m: m.farmable_evo, lambda c: c.farmable_evo)
 
         if self.haste:
             text = "charge allies' skill by {}".format(self.haste)
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('haste({})'.format(self.haste), text)
 
         if self.inheritable:
-            self.filters.append(lambda m: m.is_inheritable)
+            self.add_predicate('inheritable', COST_FIELD, lambda m: m.is_inheritable, lambda c: c.is_inheritable)
 
         if self.shuffle:
-            text = 'replace all'
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('shuffle', 'replace all')
 
         if self.unlock:
-            text = 'removes lock'
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('unlock', 'removes lock')
 
         if self.delay:
             text = 'delay enemies for {}'.format(self.delay)
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('delay({})'.format(self.delay), text)
 
         if self.combo:
             text = 'increase combo count by {}'.format(self.combo)
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('combo({})'.format(self.combo), text)
 
         if self.convert:
             text_from = self.convert[0][0]
             text_to = self.convert[0][1]
-            self.filters.append(lambda m,
-                                       tt=text_to,
-                                       tf=text_from:
-                                [tt] in m.search.orb_convert.values() if text_from == 'any' else
-                                (tf in m.search.orb_convert.keys() if text_to == 'any' else
-                                 (tf in m.search.orb_convert.keys() and
-                                  tt in m.search.orb_convert[tf])))
+            self.add_predicate('convert({}, {})'.format(text_from, text_to), COST_MEMBERSHIP,
+                               lambda m,
+                                      tt=text_to,
+                                      tf=text_from:
+                               [tt] in m.search.orb_convert.values() if text_from == 'any' else
+                               (tf in m.search.orb_convert.keys() if text_to == 'any' else
+                                (tf in m.search.orb_convert.keys() and
+                                 tt in m.search.orb_convert[tf])))
 
         if self.absorbnull:
-            text = 'damage absorb shield'
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('absorbnull', 'damage absorb shield')
 
         if self.attabsorb:
-            text = 'att. absorb shield'
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('attabsorb', 'att. absorb shield')
 
         if self.shield:
             text = 'damage taken by {}%'.format(self.shield)
-            self.filters.append(lambda m, t=text: t in m.search.active_desc)
+            self.add_active_desc_predicate('shield({})'.format(self.shield), text)
 
         if self.atk:
-            self.filters.append(lambda m: m.search.atk and m.search.atk >= self.atk)
+            self.add_predicate('atk({})'.format(self.atk), COST_FIELD,
+                               lambda m, atk=self.atk: m.search.atk and m.search.atk >= atk,
+                               lambda c, atk=self.atk: c.atk >= atk)
 
         if self.hp:
-            self.filters.append(lambda m: m.search.hp and m.search.hp >= self.hp)
+            self.add_predicate('hp({})'.format(self.hp), COST_FIELD,
+                               lambda m, hp=self.hp: m.search.hp and m.search.hp >= hp,
+                               lambda c, hp=self.hp: c.hp >= hp)
 
         if self.rcv:
-            self.filters.append(lambda m: m.search.rcv and m.search.rcv >= self.rcv)
+            self.add_predicate('rcv({})'.format(self.rcv), COST_FIELD,
+                               lambda m, rcv=self.rcv: m.search.rcv and m.search.rcv >= rcv,
+                               lambda c, rcv=self.rcv: c.rcv >= rcv)
 
         if self.weighted:
-            self.filters.append(lambda m: m.search.weighted_stats and m.search.weighted_stats >= self.weighted)
+            self.add_predicate('weighted({})'.format(self.weighted), COST_FIELD,
+                               lambda m, w=self.weighted: m.search.weighted_stats and m.search.weighted_stats >= w,
+                               lambda c, w=self.weighted: c.weighted_stats >= w)
 
         # Multiple
         if self.active:
@@ -510,20 +534,22 @@ class SearchConfig(object):
             for ft in self.active:
                 text = ft.lower()
                 filters.append(lambda m, t=text: t in m.search.active)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('active', self.active, COST_LONG_TEXT, filters,
+                                  self.or_skill_text_masks('active', self.active))
 
         if self.board:
             filters = []
             for colors in self.board:
                 filters.append(board_filter(colors))
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('board', [','.join(c) for c in self.board], COST_MEMBERSHIP, filters)
 
         if self.color:
             filters = []
             for ft in self.color:
                 text = ft.lower()
                 filters.append(lambda m, c=text: c in m.search.color)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('color', self.color, COST_MEMBERSHIP, filters,
+                                  lambda c, names=[v.lower() for v in self.color]: c.has_any(c.color, c.color_bits, names))
 
         if self.column:
             filters = []
@@ -533,28 +559,30 @@ class SearchConfig(object):
                     filters.append(lambda m: m.search.column_convert)
                 else:
                     filters.append(lambda m, t=text: t in m.search.column_convert)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('column', self.column, COST_MEMBERSHIP, filters)
 
         if self.hascolor:
             filters = []
             for ft in self.hascolor:
                 text = ft.lower()
                 filters.append(lambda m, c=text: c in m.search.hascolor)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('hascolor', self.hascolor, COST_MEMBERSHIP, filters,
+                                  lambda c, names=[v.lower() for v in self.hascolor]: c.has_any(c.hascolor, c.color_bits, names))
 
         if self.leader:
             filters = []
             for ft in self.leader:
                 text = ft.lower()
                 filters.append(lambda m, t=text: t in m.search.leader)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('leader', self.leader, COST_LONG_TEXT, filters,
+                                  self.or_skill_text_masks('leader', self.leader))
 
         if self.name:
             filters = []
             for ft in self.name:
                 text = ft.lower()
                 filters.append(lambda m, t=text: t in m.search.name)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('name', self.name, COST_TEXT, filters)
 
         if self.row:
             filters = []
@@ -564,28 +592,51 @@ class SearchConfig(object):
                     filters.append(lambda m: m.search.row_convert)
                 else:
                     filters.append(lambda m, t=text: t in m.search.row_convert)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('row', self.row, COST_MEMBERSHIP, filters)
 
         if self.types:
             filters = []
             for ft in self.types:
                 text = ft.lower()
                 filters.append(lambda m, t=text: t in m.search.types)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('type', self.types, COST_MEMBERSHIP, filters,
+                                  lambda c, names=[v.lower() for v in self.types]: c.has_any(c.types, c.type_bits, names))
 
         if self.remove:
             filters = []
             for ft in self.remove:
                 text = ft.lower()
                 filters.append(lambda m, t=text: t not in m.search.name)
-            self.filters.append(self.or_filters(filters))
+            self.add_or_predicate('remove', self.remove, COST_TEXT, filters)
 
-        if not self.filters:
+        if not self.predicates:
             raise rpadutils.ReportableError('You need to specify at least one filter')
 
+    def add_predicate(self, name, cost, fn, column_mask=None):
+        self.predicates.append(SearchPredicate(name, cost, fn, column_mask))
+
+    def add_active_desc_predicate(self, name, text):
+        self.add_predicate(name, COST_LONG_TEXT, lambda m, t=text: t in m.search.active_desc,
+                           lambda c, t=text: c.skill_text_contains('active_desc', t))
+
+    def or_skill_text_masks(self, field, values):
+        texts = [v.lower() for v in values]
+
+        def column_mask(c):
+            mask = c.skill_text_contains(field, texts[0])
+            for text in texts[1:]:
+                mask |= c.skill_text_contains(field, text)
+            return mask
+        return column_mask
+
+    def add_or_predicate(self, name, values, cost, filters, column_mask=None):
+        name = '{}({})'.format(name, '|'.join(map(str, values)))
+        fn = filters[0] if len(filters) == 1 else self.or_filters(filters)
+        self.add_predicate(name, cost * len(filters), fn, column_mask)
+
     def check_filters(self, m):
-        for f in self.filters:
-            if not f(m):
+        for p in self.predicates:
+            if not p.fn(m):
                 return False
         return True
 
@@ -606,11 +657,132 @@ class SearchConfig(object):
         return new_value
 
 
+class SearchPredicate(object):
+    """One filter that every search result must pass.
+
+    fn tests a single monster. column_mask, if set, answers the same question for
+    every monster at once from a padguide2.MonsterColumnStore, as a boolean array.
+    """
+
+    def __init__(self, name: str, cost: int, fn, column_mask=None):
+        self.name = name
+        self.cost = cost
+        self.fn = fn
+        self.column_mask = column_mask
+
+
+# Results never include gems
+EXCLUDE_GEMS = SearchPredicate('remove( gem)', COST_TEXT, lambda m: ' gem' not in m.search.name)
+
+
+class SearchPlan(object):
+    """Runs predicates over every monster, short-circuiting on the first failure.
+
+    Predicates with a column_mask go first, as boolean masks over the whole column
+    store. The rest run row by row on the survivors, cheap and selective ones first:
+    they're ordered by cost / rejection rate, with rejection rates estimated on an
+    evenly spaced sample of the survivors.
+    """
+
+    def __init__(self, predicates, columns, use_columns=True):
+        self.columns = columns
+        self.column_predicates = [p for p in predicates if use_columns and p.column_mask]
+        self.row_predicates = [p for p in predicates if p not in self.column_predicates]
+
+        # Filled in by run(); predicates in the order they ran
+        self.predicates = []
+        self.pass_rates = {}
+        self.rejected = {}
+        self.checked = 0
+        self.secs = 0
+
+    def run(self):
+        start = time.time()
+        monsters = self.columns.monsters
+        self.checked = len(monsters)
+        self.predicates = []
+
+        matched = monsters
+        if self.column_predicates:
+            masks = {p: p.column_mask(self.columns) for p in self.column_predicates}
+            for p, mask in masks.items():
+                self.pass_rates[p] = np.count_nonzero(mask) / len(mask) if len(mask) else 1.0
+
+            combined = np.ones(len(monsters), dtype=bool)
+            remaining = len(monsters)
+            for p in sorted(self.column_predicates, key=self.pass_rates.get):
+                combined &= masks[p]
+                survivors = int(np.count_nonzero(combined))
+                self.rejected[p] = remaining - survivors
+                remaining = survivors
+                self.predicates.append(p)
+            matched = self.columns.rows(combined)
+
+        sample = matched[::max(1, len(matched) // PLAN_SAMPLE_SIZE)]
+        for p in self.row_predicates:
+            passed = sum(1 for m in sample if p.fn(m))
+            self.pass_rates[p] = passed / len(sample) if sample else 1.0
+
+        def rank(p):
+            rejection_rate = 1.0 - self.pass_rates[p]
+            return p.cost / rejection_rate if rejection_rate else float('inf')
+
+        # Each monster still stops at the first predicate it fails
+        for p in sorted(self.row_predicates, key=rank):
+            survivors = list(filter(p.fn, matched))
+            self.rejected[p] = len(matched) - len(survivors)
+            matched = survivors
+            self.predicates.append(p)
+
+        self.secs = time.time() - start
+        return matched
+
+    def explain(self):
+        msg = 'Checked {} monsters in {:.1f}ms\n'.format(self.checked, self.secs * 1000)
+        msg += '{:<3} {:<30} {:<6} {:>4} {:>9} {:>7} {:>8}\n'.format(
+            '#', 'predicate', 'how', 'cost', 'est. pass', 'checked', 'rejected')
+        remaining = self.checked
+        for i, p in enumerate(self.predicates):
+            msg += '{:<3} {:<30} {:<6} {:>4} {:>9.1%} {:>7} {:>8}\n'.format(
+                i + 1, p.name[:30], 'column' if p in self.column_predicates else 'row', p.cost,
+                self.pass_rates[p], remaining, self.rejected[p])
+            remaining -= self.rejected[p]
+        msg += 'Matched {}'.format(remaining)
+        return msg
+
+
+def benchmark_search(predicates, columns, runs=BENCHMARK_RUNS):
+    """Times a search filtering row by row, and through the column store.
+
+    Returns row seconds per run, column seconds per run, and whether the results match.
+    """
+    def replay(use_columns):
+        start_time = time.time()
+        for _ in range(runs):
+            matched = SearchPlan(predicates, columns, use_columns=use_columns).run()
+        return (time.time() - start_time) / runs, matched
+
+    row_secs, row_matched = replay(False)
+    column_secs, column_matched = replay(True)
+    return row_secs, column_secs, row_matched == column_matched
+
+
 class PadSearch:
     """PAD data searching."""
 
     def __init__(self, bot):
         self.bot = bot
+        # Building the lexer compiles its tables, so do it once; each parse uses a clone
+        self.lexer = PadSearchLexer().build()
+        self.config_cache = rpadutils.LruCache(SEARCH_CONFIG_CACHE_SIZE)
+        # (database generation, spec) -> tuple of monster_no, in display order
+        self.result_cache = rpadutils.LruCache(SEARCH_RESULT_CACHE_SIZE)
+
+    async def on_padguide2_generation_changed(self, change):
+        if self != self.bot.get_cog('PadSearch'):
+            return
+        # Results from older generations can't be hit again
+        self.result_cache.clear()
 
     @commands.command(pass_context=True)
     async def helpsearch(self, ctx):
@@ -622,24 +794,7 @@ class PadSearch:
         """Searches for monsters based on a filter you specify.
         Use ^helpsearch for more info.
         """
-        try:
-            config = self._make_search_config(filter_spec)
-        except Exception as ex:
-            # Try to correct for missing closing tag
-            try:
-                config = self._make_search_config(filter_spec + ')')
-            except:
-                # If it still failed, raise the original exception
-                raise ex
-        pg_cog = self.bot.get_cog('PadGuide2')
-        monsters = pg_cog.database.all_monsters()
-        matched_monsters = list(filter(config.check_filters, monsters))
-
-        # Removing entry with names that have gems in it
-        rmvGemFilter = self._make_search_config('remove( gem)')
-        matched_monsters = list(filter(rmvGemFilter.check_filters, matched_monsters))
-
-        matched_monsters.sort(key=lambda m: m.monster_no_na, reverse=True)
+        matched_monsters = self._search_monsters(filter_spec)
 
         msg = []
         for page in range(0, int(len(matched_monsters) / 10) + 1):
@@ -653,8 +808,80 @@ class PadSearch:
 
         await self.bot.say(box(msg[0]))
 
+    @commands.command(pass_context=True)
+    @checks.is_owner()
+    async def explainsearch(self, ctx, *, filter_spec: str):
+        """Runs a search and shows the order its filters ran in, and what each rejected."""
+        plan, matched_monsters = self._run_search(filter_spec)
+        await self.bot.say(box(plan.explain()))
+
+    @commands.command(pass_context=True)
+    @checks.is_owner()
+    async def searchcache(self, ctx):
+        """Prints search spec and result cache stats."""
+        msg = 'Specs: {}\n'.format(self.config_cache.stats_text())
+        msg += 'Results: {}'.format(self.result_cache.stats_text())
+        await self.bot.say(box(msg))
+
+    @commands.command(pass_context=True)
+    @checks.is_owner()
+    async def benchsearch(self, ctx, *, filter_specs: str):
+        """Times ;-separated searches filtering row by row vs through the column store."""
+        columns = self._database().monster_columns
+        msg = ''
+        for filter_spec in filter_specs.split(';'):
+            filter_spec = filter_spec.strip()
+            predicates = self._parse_filter_spec(filter_spec).predicates + [EXCLUDE_GEMS]
+            row_secs, column_secs, same = await self.bot.loop.run_in_executor(
+                None, benchmark_search, predicates, columns)
+            msg += '{}\n  rows: {:.2f}ms, columns: {:.2f}ms{}\n'.format(
+                filter_spec, row_secs * 1000, column_secs * 1000, '' if same else ' (RESULTS DIFFER)')
+        for page in pagify(msg):
+            await self.bot.say(box(page))
+
+    def _search_monsters(self, filter_spec):
+        """Monsters matching filter_spec, newest first.
+
+        Only monster_no values are cached, so old database generations aren't kept alive.
+        """
+        database = self._database()
+        key = (database.generation, filter_spec.strip())
+        monster_nos = self.result_cache.get(key)
+        if monster_nos is None:
+            plan, matched_monsters = self._run_search(filter_spec, database)
+            matched_monsters.sort(key=lambda m: m.monster_no_na, reverse=True)
+            monster_nos = tuple(m.monster_no for m in matched_monsters)
+            self.result_cache.put(key, monster_nos)
+        return [database.getMonster(monster_no) for monster_no in monster_nos]
+
+    def _run_search(self, filter_spec, database=None):
+        config = self._parse_filter_spec(filter_spec)
+        database = database or self._database()
+        plan = SearchPlan(config.predicates + [EXCLUDE_GEMS], database.monster_columns)
+        return plan, plan.run()
+
+    def _parse_filter_spec(self, filter_spec):
+        filter_spec = filter_spec.strip()
+        config = self.config_cache.get(filter_spec)
+        if config is None:
+            try:
+                config = self._make_search_config(filter_spec)
+            except Exception as ex:
+                # Try to correct for missing closing tag
+                try:
+                    config = self._make_search_config(filter_spec + ')')
+                except:
+                    # If it still failed, raise the original exception
+                    raise ex
+            self.config_cache.put(filter_spec, config)
+        return config
+
+    def _database(self):
+        pg_cog = self.bot.get_cog('PadGuide2')
+        return pg_cog.get_database_handle().database
+
     def _make_search_config(self, input):
-        lexer = PadSearchLexer().build()
+        lexer = self.lexer.clone()
         lexer.input(input)
         return SearchConfig(lexer)
 
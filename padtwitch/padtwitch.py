@@ -106,8 +106,11 @@ class PadTwitch:
         for action_name, action_fn in self.monster_actions.items():
             if message.startswith(action_name):
                 query = message[len(action_name):]
-                m = self.lookup_monster(query)
+                m, alternatives = self.lookup_monster(query)
                 msg = action_fn(channel, username, m) if m else 'no matches for ' + query
+                if alternatives:
+                    msg += ' | or: ' + ', '.join('{}. {}'.format(nm.monster_no_na, nm.name_na)
+                                                 for nm in alternatives)
                 self.stream.send_chat_message(channel, msg)
                 return
 
@@ -125,9 +128,9 @@ class PadTwitch:
     def lookup_monster(self, query):
         padinfo = self.bot.get_cog('PadInfo')
         if not padinfo:
-            return None
-        m, _, _ = padinfo.findMonster(query)
-        return m
+            return None, []
+        m, _, _, alternatives = padinfo.findMonsterWithAlternatives(query)
+        return m, alternatives
 
     def _get_header(self, m):
         return '{}. {}'.format(m.monster_id_na, m.name_na)
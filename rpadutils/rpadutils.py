@@ -1,11 +1,19 @@
 import asyncio
+from collections import Counter
+from collections import OrderedDict
+from collections import defaultdict
+import copy
+import difflib
+import heapq
 import inspect
 import json
 import os
 from pathlib import Path
 import re
+import threading
 import time
 import unicodedata
+import urllib.parse
 
 import aiohttp
 import backoff
@@ -182,24 +190,100 @@ def checkPadguideCacheFile(cache_file, expiry_secs):
     return False
 
 
-async def async_cached_padguide_request(client_session, endpoint, result_file, time_ms=0):
+PADGUIDE_STORAGE_URL = 'https://storage.googleapis.com/mirubot/paddata/padguide/{}.json'
+
+
+class AsyncRateLimiter(object):
+    """Bounds the number of concurrent requests, and spaces out request starts per host."""
+
+    def __init__(self, max_concurrent: int, requests_per_sec_per_host: float):
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._min_interval_secs = 1 / requests_per_sec_per_host if requests_per_sec_per_host > 0 else 0
+        self._host_next_start = defaultdict(float)
+
+    async def acquire(self, url: str):
+        await self._semaphore.acquire()
+        host = urllib.parse.urlparse(url).netloc
+        now = time.time()
+        start = max(now, self._host_next_start[host])
+        self._host_next_start[host] = start + self._min_interval_secs
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def release(self):
+        self._semaphore.release()
+
+
+async def async_cached_padguide_request(client_session, endpoint, result_file, time_ms=0, rate_limiter=None):
     """Make a request to the PadGuide API.
 
     The endpoint is the JSP file name on the PadGuide API.
     The result_file is the place to store the resulting file.
     The time_ms is the time since update to pull for. Set to 0 for all time. Cannot be 0 for events.
+
+    The response is streamed into a temp file which replaces result_file once it is known
+    to be valid JSON. The ETag of the last download is stored next to result_file, and the
+    file is left untouched if the server reports it has not changed.
+
+    Returns the number of bytes downloaded, 0 if the file was unchanged.
     """
-    resp = await async_padguide_ts_request(client_session, time_ms, endpoint)
-    writeJsonFile(result_file, resp)
+    etag_file = result_file + '.etag'
+    etag = None
+    if os.path.exists(result_file) and os.path.exists(etag_file):
+        etag = readPlainFile(etag_file)
+
+    url = PADGUIDE_STORAGE_URL.format(endpoint)
+    tmp_file = result_file + '.tmp'
+    if rate_limiter:
+        await rate_limiter.acquire(url)
+    try:
+        byte_count, new_etag = await async_padguide_ts_request(
+            client_session, time_ms, endpoint, tmp_file, etag=etag)
+    finally:
+        if rate_limiter:
+            rate_limiter.release()
+
+    if byte_count is None:
+        print('{} not modified, skipping'.format(endpoint))
+        return 0
+
+    try:
+        readJsonFile(tmp_file)
+    except Exception:
+        os.remove(tmp_file)
+        raise
+    os.replace(tmp_file, result_file)
+
+    if new_etag:
+        writePlainFile(etag_file, new_etag)
+    elif os.path.exists(etag_file):
+        os.remove(etag_file)
+    return byte_count
 
 
 @backoff.on_exception(backoff.expo, aiohttp.ClientError, max_time=60)
 @backoff.on_exception(backoff.expo, aiohttp.DisconnectedError, max_time=60)
-async def async_padguide_ts_request(client_session, time_ms, endpoint):
-    STORAGE_URL = 'https://storage.googleapis.com/mirubot/paddata/padguide/{}.json'
-    url = STORAGE_URL.format(endpoint)
-    async with client_session.get(url) as resp:
-        return await resp.json()
+async def async_padguide_ts_request(client_session, time_ms, endpoint, result_file, etag=None):
+    """Streams an endpoint into result_file.
+
+    Returns (byte count, etag), or (None, etag) if the ETag still matches.
+    """
+    url = PADGUIDE_STORAGE_URL.format(endpoint)
+    headers = {'If-None-Match': etag} if etag else {}
+    async with client_session.get(url, headers=headers) as resp:
+        if resp.status == 304:
+            return None, etag
+        resp.raise_for_status()
+
+        byte_count = 0
+        with open(result_file, 'wb') as f:
+            while True:
+                chunk = await resp.content.read(64 * 1024)
+                if not chunk:
+                    break
+                f.write(chunk)
+                byte_count += len(chunk)
+        return byte_count, resp.headers.get('ETag')
 
 
 def writePlainFile(file_path, text_data):
@@ -526,6 +610,139 @@ def rmdiacritics(input):
     return output
 
 
+class FuzzyMatcher(object):
+    """Finds close matches within a fixed set of strings.
+
+    Returns exactly what difflib.get_close_matches would over the same
+    possibilities, but much faster on large sets. difflib's cheap upper
+    bounds (real_quick_ratio and quick_ratio, which only depend on lengths
+    and on the characters in common) are computed for every possibility at
+    once from an inverted index, and only the survivors get a full ratio().
+    """
+
+    def __init__(self, possibilities):
+        self.possibilities = list(possibilities)
+        self._lengths = [len(x) for x in self.possibilities]
+        # (char, k) -> positions of possibilities with at least k copies of char
+        self._postings = defaultdict(list)
+        for position, possibility in enumerate(self.possibilities):
+            for c, count in Counter(possibility).items():
+                for k in range(1, count + 1):
+                    self._postings[(c, k)].append(position)
+        # Positions this matcher may return, or None for all of them
+        self._allowed = None
+
+    def restricted_to(self, possibilities):
+        """A matcher over a subset of the possibilities that shares this one's index."""
+        wanted = set(possibilities)
+        matcher = copy.copy(self)
+        matcher._allowed = {position for position, x in enumerate(self.possibilities) if x in wanted}
+        return matcher
+
+    def get_close_matches(self, word, n=3, cutoff=0.6):
+        """Same arguments and results as difflib.get_close_matches."""
+        return [x for score, x in self.get_scored_matches(word, n, cutoff)]
+
+    def get_scored_matches(self, word, n=3, cutoff=0.6):
+        """Like get_close_matches, but returns (ratio, possibility) pairs."""
+        if not n > 0:
+            raise ValueError('n must be > 0: %r' % (n,))
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError('cutoff must be in [0.0, 1.0]: %r' % (cutoff,))
+
+        # Characters in common with each possibility, counting repeats; this is what
+        # quick_ratio computes one possibility at a time
+        common_counts = Counter()
+        for c, count in Counter(word).items():
+            for k in range(1, count + 1):
+                common_counts.update(self._postings.get((c, k), ()))
+
+        # Even the shortest possibility real_quick_ratio allows needs this many in common
+        word_len = len(word)
+        min_common = cutoff * word_len / (2 - cutoff) - 1e-9
+        allowed = self._allowed
+        if min_common > 0:
+            positions = []
+            for position, common in common_counts.most_common():
+                if common < min_common:
+                    break
+                if allowed is None or position in allowed:
+                    positions.append(position)
+        else:
+            positions = range(len(self.possibilities)) if allowed is None else allowed
+
+        s = difflib.SequenceMatcher()
+        s.set_seq2(word)
+        result = []
+        for position in positions:
+            # Same bounds and float math as difflib, so the same possibilities pass
+            length = word_len + self._lengths[position]
+            if not length:
+                if 1.0 >= cutoff:
+                    result.append((1.0, self.possibilities[position]))
+                continue
+            if 2.0 * min(word_len, self._lengths[position]) / length < cutoff:
+                continue
+            if 2.0 * common_counts[position] / length < cutoff:
+                continue
+            x = self.possibilities[position]
+            s.set_seq1(x)
+            if s.ratio() >= cutoff:
+                result.append((s.ratio(), x))
+
+        return heapq.nlargest(n, result)
+
+
+class LruCache(object):
+    """Bounded mapping that evicts the least recently used key.
+
+    Safe to share between the bot loop and helper threads (e.g. padtwitch).
+    get() returns None on a miss, so don't cache None values.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats_text(self):
+        lookups = self.hits + self.misses
+        return '{} hits, {} misses ({:.1%} hit ratio), {}/{} entries, {} evictions'.format(
+            self.hits, self.misses, self.hits / lookups if lookups else 0,
+            len(self._items), self.max_size, self.evictions)
+
+
 def clean_global_mentions(content):
     """Wipes out mentions to @everyone and @here."""
     return re.sub(r'(@)(\w)', '\\g<1>\u200b\\g<2>', content)
@@ -1,5 +1,4 @@
 from _collections import OrderedDict
-import difflib
 import json
 import os
 from time import time
@@ -13,7 +12,7 @@ from cogs.utils import checks
 from cogs.utils.chat_formatting import pagify, box
 from cogs.utils.dataIO import dataIO
 
-from .rpadutils import Menu, char_to_emoji
+from .rpadutils import FuzzyMatcher, Menu, char_to_emoji
 from .utils.chat_formatting import *
 
 
@@ -26,6 +25,8 @@ class SchoolIdol:
     def __init__(self, bot):
         self.bot = bot
         self.card_data = []
+        self.names_to_card = {}
+        self.name_matcher = FuzzyMatcher([])
         self.menu = Menu(bot)
         self.regular_emoji = char_to_emoji('r')
         self.idol_emoji = char_to_emoji('i')
@@ -57,6 +58,7 @@ class SchoolIdol:
             **collection_name_to_card,
             ** collection_firstname_to_card,
         }
+        self.name_matcher = FuzzyMatcher(self.names_to_card.keys())
 
     @commands.command(pass_context=True)
     async def sifid(self, ctx, *, query: str):
@@ -68,8 +70,7 @@ class SchoolIdol:
         else:
             c = self.names_to_card.get(query, None)
             if c is None:
-                matches = difflib.get_close_matches(
-                    query, self.names_to_card.keys(), n=1, cutoff=.6)
+                matches = self.name_matcher.get_close_matches(query, n=1, cutoff=.6)
                 if len(matches):
                     c = self.names_to_card[matches[0]]
 